@@ -6,55 +6,158 @@ A plant and garden supply trading platform
 
 import os
 import json
-from datetime import datetime
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for
+import sqlite3
+import time
+from datetime import datetime, timezone
+from itertools import chain, islice
+from flask import (Flask, render_template, request, jsonify, redirect, url_for, stream_template,
+                   stream_with_context)
+from markupsafe import Markup
+
+from dedup import Fingerprint, NearDuplicateIndex
+from dedup import MODES as DUPLICATE_MODES
+from events import StoreFollower, TradeFeed
+from fragment_cache import FragmentCache
+from geo import GridIndex, geocode
+from jobs import DEFAULT_JOBS_PATH, JobQueue, WorkerPool, temporary_jobs_path
+from matching import TOP_K, MatchIndex
+from metrics import Metrics
+from search import SearchIndex
+from serialization import json_provider_class
+from shared_cache import ResponseCache, create_shared_tier
+from static_assets import AssetPipeline
+from storage import TRADE_CATEGORIES, TRADE_COLUMNS, SQLiteTradeStore, create_store
+from template_cache import TemplateCache
+from throttling import Overloaded, RateLimiter, WriteGate, retry_after_header
 
 # Initialize Flask app
 app = Flask(__name__)
+# JSON_ENCODER=auto|orjson|stdlib; auto uses orjson when it is installed
+app.json_provider_class = json_provider_class()
+app.json = app.json_provider_class(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'garden-trade-secret-key')
 
-# Simple in-memory storage for trades
-trades_data = [
-    {
-        "id": 1,
-        "title": "Tomato Seedlings for Herbs",
-        "category": "Plants",
-        "offering": "6 healthy tomato seedlings (Roma and Cherry varieties)",
-        "seeking": "Herb cuttings (basil, oregano, thyme)",
-        "description": "I have extra tomato seedlings that need good homes. Looking for herb cuttings to start my herb garden.",
-        "location": "Portland, OR",
-        "contact_name": "Sarah Johnson",
-        "contact_email": "sarah.j@email.com",
-        "contact_phone": "(503) 555-0123",
-        "created_at": "2025-07-08"
-    },
-    {
-        "id": 2,
-        "title": "Garden Tools Exchange",
-        "category": "Tools",
-        "offering": "Rake and small shovel, lightly used",
-        "seeking": "Pruning shears or watering can",
-        "description": "Downsizing my tool collection. These are in great condition and ready for a new garden.",
-        "location": "Seattle, WA",
-        "contact_name": "Mike Chen",
-        "contact_email": "mike.chen@email.com",
-        "contact_phone": "(206) 555-0456",
-        "created_at": "2025-07-07"
-    },
-    {
-        "id": 3,
-        "title": "Organic Seeds Collection",
-        "category": "Seeds",
-        "offering": "Variety pack of organic vegetable seeds",
-        "seeking": "Flower seeds or bulbs",
-        "description": "I have extra packets of organic carrot, lettuce, and radish seeds. Looking for flower seeds to beautify my garden.",
-        "location": "San Francisco, CA",
-        "contact_name": "Emily Rodriguez",
-        "contact_email": "emily.r@email.com",
-        "contact_phone": "",
-        "created_at": "2025-07-06"
-    }
-]
+# Request latency, render and serialization timings, exported at /metrics
+metrics = Metrics(app)
+
+# Stylesheets and scripts, served precompressed under content-hashed URLs
+assets = AssetPipeline(os.path.dirname(os.path.abspath(__file__)))
+assets.init_app(app)
+assets.register('hub.css', 'add_trade.css', 'style.css', 'script.js')
+
+# Trade storage (TRADE_STORE=sqlite|memory) with the full-text, proximity
+# and matchmaking indexes over it.  sync_indexes() brings the indexes up to
+# date with trades added since, by this or any other worker.  A background
+# thread in every process runs it every INDEX_SYNC_SECONDS, and drops
+# trades deleted since (by dedup.py --apply, say) from the indexes; reads
+# still skip ids whose trade is gone in the meantime.  Index-backed
+# reads run it too, without waiting and for at most READ_SYNC_LIMIT trades,
+# so they see a fresh post at once but never stall behind a bulk import.
+store = create_store()
+search_index = SearchIndex()
+spatial_index = GridIndex()
+match_index = MatchIndex()
+# Batches up to this size update cached match lists trade by trade;
+# larger ones drop them to be rebuilt on demand
+MATCH_INCREMENTAL_BATCH = 100
+
+def index_trades(trades):
+    """Add newly stored trades to the search, proximity and match indexes"""
+    search_index.add_many(trades)
+    if len(trades) <= MATCH_INCREMENTAL_BATCH:
+        for trade in trades:
+            match_index.add(trade)
+    else:
+        match_index.add_many(trades)
+    for trade in trades:
+        point = geocode(trade.location)
+        if point is not None:
+            spatial_index.add(trade.id, *point)
+
+def unindex_trades(trade_ids):
+    """Drop deleted trades from the search, proximity and match indexes"""
+    search_index.remove(trade_ids)
+    match_index.remove(trade_ids)
+    spatial_index.remove(trade_ids)
+
+sync_indexes = StoreFollower(store, index_trades, unindex_trades)
+search_index.add_many(trade for trade in store.iter_all() if trade.id <= sync_indexes.through)
+spatial_index.add_many(point for point in store.coordinates() if point[0] <= sync_indexes.through)
+match_index.add_many(trade for trade in store.iter_all() if trade.id <= sync_indexes.through)
+INDEX_SYNC_SECONDS = float(os.environ.get('INDEX_SYNC_SECONDS', 1))
+READ_SYNC_LIMIT = 50
+sync_indexes.follow(INDEX_SYNC_SECONDS)
+
+def sync_for_read():
+    sync_indexes(wait=False, limit=READ_SYNC_LIMIT)
+
+# Repost detection over contact email and listing text, checked before
+# every insert.  DUPLICATE_MODE=flag stores reposts and reports them,
+# reject refuses them, off skips the check; DUPLICATE_THRESHOLD is the
+# text similarity (0-1) that counts as a repost.  A flagged repost is
+# stored with ``duplicate_of`` set.  The index has its own follower, which
+# adds and drops trades in the background like the others, so the check
+# never waits on the heavier indexes or fingerprints a whole import on a
+# request.
+DUPLICATE_MODE = os.environ.get('DUPLICATE_MODE', 'flag').lower()
+if DUPLICATE_MODE not in DUPLICATE_MODES:
+    raise ValueError('unknown DUPLICATE_MODE: %r' % DUPLICATE_MODE)
+duplicate_index = NearDuplicateIndex(float(os.environ.get('DUPLICATE_THRESHOLD', 0.8)))
+sync_duplicates = StoreFollower(store, duplicate_index.add_many, duplicate_index.remove)
+if DUPLICATE_MODE != 'off':
+    duplicate_index.add_many(trade for trade in store.iter_all()
+                             if trade.id <= sync_duplicates.through)
+    sync_duplicates.follow(INDEX_SYNC_SECONDS)
+duplicates_found = {'flagged': 0, 'rejected': 0}
+
+def sync_duplicates_for_check():
+    """Index the few trades just added before a check.  A repost of a
+    listing the background follower has not reached yet, in the middle of
+    a large import, goes unnoticed rather than delaying the request."""
+    sync_duplicates(wait=False, limit=READ_SYNC_LIMIT)
+
+def find_duplicate(fingerprint):
+    """``(trade_id, similarity)`` of the stored listing ``fingerprint``
+    reposts, or None; call sync_duplicates_for_check() first"""
+    return duplicate_index.find(fingerprint, store.get_many)
+
+def count_duplicate():
+    outcome = 'rejected' if DUPLICATE_MODE == 'reject' else 'flagged'
+    duplicates_found[outcome] += 1
+
+# Post-submit work runs on a job queue (JOBS_DATABASE_PATH, by default
+# garden_jobs.db beside the trade database, a temporary file for the memory
+# store) worked by JOB_WORKERS threads in every process, polling every
+# JOB_POLL_SECONDS, so add_trade() only validates, persists and enqueues.
+#
+# For now this is scaffolding with no steps registered: the indexes, repost
+# detection and the live feed all follow the store themselves, so nothing
+# is queued and a post costs no second commit.  To add a step, register
+# its handler in JOB_HANDLERS and its kind in POST_SUBMIT_JOBS; each job
+# gets the first and last id of the trades just stored.
+JOB_HANDLERS = {}
+POST_SUBMIT_JOBS = ()
+job_queue = JobQueue.from_environ(
+    os.path.join(os.path.dirname(store.path), DEFAULT_JOBS_PATH)
+    if isinstance(store, SQLiteTradeStore) else temporary_jobs_path())
+job_workers = WorkerPool.from_environ(job_queue, JOB_HANDLERS)
+job_workers.start()
+
+def enqueue_post_submit(trades):
+    """Queue the POST_SUBMIT_JOBS for newly stored trades; returns the job ids
+
+    The trades are already stored, so a queue that cannot take the jobs is
+    logged rather than failing the request that stored them.
+    """
+    payload = {'first_id': trades[0].id, 'last_id': trades[-1].id}
+    job_ids = []
+    for kind in POST_SUBMIT_JOBS:
+        try:
+            job_ids.append(job_queue.enqueue(kind, payload))
+        except sqlite3.Error:
+            app.logger.exception('could not queue %s job for trades %d-%d',
+                                 kind, payload['first_id'], payload['last_id'])
+    return job_ids
 
 # HTML template for the main page
 HTML_TEMPLATE = """
@@ -66,239 +169,7 @@ HTML_TEMPLATE = """
     <title>Garden Trade Hub - Plant & Garden Supply Trading</title>
     <meta name="description" content="Connect with fellow gardeners to trade plants, seeds, tools, and garden supplies.">
     <link rel="icon" type="image/svg+xml" href="data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🌱</text></svg>">
-    <style>
-        /* Include all the CSS from style.css here */
-        :root {
-            --primary-color: #16a34a;
-            --primary-dark: #15803d;
-            --secondary-color: #059669;
-            --accent-color: #22c55e;
-            --light-green: #dcfce7;
-            --gray: #6b7280;
-            --dark-gray: #374151;
-            --light-gray: #f8fafc;
-            --white: #ffffff;
-            --shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            --border-radius: 8px;
-            --transition: all 0.3s ease;
-        }
-        
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: var(--dark-gray);
-            background-color: var(--light-gray);
-        }
-        
-        .container { max-width: 1200px; margin: 0 auto; padding: 0 20px; }
-        
-        /* Navigation */
-        .navbar {
-            background: var(--white);
-            box-shadow: var(--shadow);
-            position: sticky;
-            top: 0;
-            z-index: 100;
-            border-bottom: 3px solid var(--primary-color);
-        }
-        
-        .navbar .container {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 1rem 20px;
-        }
-        
-        .nav-brand {
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: var(--primary-color);
-        }
-        
-        .nav-links {
-            display: flex;
-            list-style: none;
-            gap: 2rem;
-        }
-        
-        .nav-links a {
-            text-decoration: none;
-            color: var(--gray);
-            font-weight: 500;
-            transition: var(--transition);
-        }
-        
-        .nav-links a:hover { color: var(--primary-color); }
-        
-        /* Hero Section */
-        .hero {
-            background: linear-gradient(135deg, var(--light-green) 0%, #f0fdf4 100%);
-            padding: 5rem 0;
-            text-align: center;
-        }
-        
-        .hero h1 {
-            font-size: 3rem;
-            font-weight: bold;
-            color: var(--primary-color);
-            margin-bottom: 1rem;
-        }
-        
-        .hero p {
-            font-size: 1.2rem;
-            color: var(--gray);
-            margin-bottom: 2rem;
-            max-width: 600px;
-            margin-left: auto;
-            margin-right: auto;
-        }
-        
-        .btn {
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            padding: 0.75rem 1.5rem;
-            border: none;
-            border-radius: var(--border-radius);
-            font-weight: 500;
-            text-decoration: none;
-            cursor: pointer;
-            transition: var(--transition);
-            font-size: 1rem;
-            margin: 0.5rem;
-        }
-        
-        .btn-primary {
-            background: var(--primary-color);
-            color: var(--white);
-        }
-        
-        .btn-primary:hover { background: var(--primary-dark); }
-        
-        .btn-secondary {
-            background: transparent;
-            color: var(--primary-color);
-            border: 2px solid var(--primary-color);
-        }
-        
-        .btn-secondary:hover {
-            background: var(--primary-color);
-            color: var(--white);
-        }
-        
-        /* Trade Section */
-        .trades-section {
-            padding: 3rem 0;
-            background: var(--white);
-        }
-        
-        .trades-section h2 {
-            text-align: center;
-            color: var(--primary-color);
-            margin-bottom: 2rem;
-        }
-        
-        .trades-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
-            gap: 2rem;
-            margin-top: 2rem;
-        }
-        
-        .trade-card {
-            background: var(--white);
-            border-radius: var(--border-radius);
-            box-shadow: var(--shadow);
-            overflow: hidden;
-            transition: var(--transition);
-        }
-        
-        .trade-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.15);
-        }
-        
-        .trade-content { padding: 1.5rem; }
-        
-        .trade-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: flex-start;
-            margin-bottom: 1rem;
-        }
-        
-        .trade-header h3 {
-            color: var(--primary-color);
-            font-size: 1.2rem;
-            margin: 0;
-        }
-        
-        .category-badge {
-            background: var(--primary-color);
-            color: var(--white);
-            padding: 0.25rem 0.75rem;
-            border-radius: 20px;
-            font-size: 0.8rem;
-            font-weight: 500;
-        }
-        
-        .trade-details {
-            margin-bottom: 1rem;
-            padding-left: 1rem;
-            border-left: 3px solid var(--primary-color);
-        }
-        
-        .trade-offer, .trade-seeking { margin-bottom: 0.5rem; }
-        .trade-offer strong { color: var(--primary-color); }
-        .trade-seeking strong { color: var(--secondary-color); }
-        
-        .trade-description {
-            color: var(--gray);
-            margin-bottom: 1rem;
-            line-height: 1.5;
-        }
-        
-        .trade-footer {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 0.5rem;
-        }
-        
-        .trade-location {
-            color: var(--gray);
-            font-size: 0.9rem;
-        }
-        
-        .trade-date {
-            color: var(--gray);
-            font-size: 0.8rem;
-        }
-        
-        /* Footer */
-        .footer {
-            background: var(--primary-dark);
-            color: var(--white);
-            padding: 3rem 0;
-            text-align: center;
-        }
-        
-        .footer p {
-            color: rgba(255, 255, 255, 0.8);
-        }
-        
-        /* Responsive */
-        @media (max-width: 768px) {
-            .hero h1 { font-size: 2.5rem; }
-            .trades-grid { grid-template-columns: 1fr; }
-            .nav-links { display: none; }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('hub.css') }}">
 </head>
 <body>
     <!-- Navigation -->
@@ -332,35 +203,7 @@ HTML_TEMPLATE = """
         <div class="container">
             <h2>Browse Trade Listings</h2>
             <div class="trades-grid">
-                {% for trade in trades %}
-                <div class="trade-card">
-                    <div class="trade-content">
-                        <div class="trade-header">
-                            <h3>{{ trade.title }}</h3>
-                            <span class="category-badge">{{ trade.category }}</span>
-                        </div>
-                        <div class="trade-details">
-                            <div class="trade-offer">
-                                <strong>Offering:</strong> {{ trade.offering }}
-                            </div>
-                            <div class="trade-seeking">
-                                <strong>Seeking:</strong> {{ trade.seeking }}
-                            </div>
-                        </div>
-                        <p class="trade-description">{{ trade.description }}</p>
-                        <div class="trade-footer">
-                            <div class="trade-location">📍 {{ trade.location }}</div>
-                            <div class="trade-date">Posted: {{ trade.created_at }}</div>
-                        </div>
-                        <div style="margin-top: 1rem;">
-                            <strong>Contact:</strong> {{ trade.contact_name }} ({{ trade.contact_email }})
-                            {% if trade.contact_phone %}
-                            <br><strong>Phone:</strong> {{ trade.contact_phone }}
-                            {% endif %}
-                        </div>
-                    </div>
-                </div>
-                {% endfor %}
+                {% for cards in trade_cards %}{{ cards }}{% endfor %}
             </div>
         </div>
     </section>
@@ -376,6 +219,37 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# One listing in the trades grid; rendered once per trade and cached
+TRADE_CARD_TEMPLATE = """
+<div class="trade-card">
+    <div class="trade-content">
+        <div class="trade-header">
+            <h3>{{ trade.title }}</h3>
+            <span class="category-badge">{{ trade.category }}</span>
+        </div>
+        <div class="trade-details">
+            <div class="trade-offer">
+                <strong>Offering:</strong> {{ trade.offering }}
+            </div>
+            <div class="trade-seeking">
+                <strong>Seeking:</strong> {{ trade.seeking }}
+            </div>
+        </div>
+        <p class="trade-description">{{ trade.description }}</p>
+        <div class="trade-footer">
+            <div class="trade-location">📍 {{ trade.location }}</div>
+            <div class="trade-date">Posted: {{ trade.created_at }}</div>
+        </div>
+        <div style="margin-top: 1rem;">
+            <strong>Contact:</strong> {{ trade.contact_name }} ({{ trade.contact_email }})
+            {% if trade.contact_phone %}
+            <br><strong>Phone:</strong> {{ trade.contact_phone }}
+            {% endif %}
+        </div>
+    </div>
+</div>
+"""
+
 ADD_TRADE_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -383,129 +257,25 @@ ADD_TRADE_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Add Trade - Garden Trade Hub</title>
-    <style>
-        :root {
-            --primary-color: #16a34a;
-            --primary-dark: #15803d;
-            --light-green: #dcfce7;
-            --gray: #6b7280;
-            --dark-gray: #374151;
-            --light-gray: #f8fafc;
-            --white: #ffffff;
-            --shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            --border-radius: 8px;
-            --transition: all 0.3s ease;
-        }
-        
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: var(--dark-gray);
-            background-color: var(--light-gray);
-        }
-        
-        .container { max-width: 800px; margin: 0 auto; padding: 20px; }
-        
-        .form-container {
-            background: var(--white);
-            padding: 2rem;
-            border-radius: var(--border-radius);
-            box-shadow: var(--shadow);
-            margin-top: 2rem;
-        }
-        
-        h1 {
-            color: var(--primary-color);
-            margin-bottom: 2rem;
-            text-align: center;
-        }
-        
-        .form-group {
-            margin-bottom: 1.5rem;
-        }
-        
-        label {
-            display: block;
-            font-weight: 600;
-            color: var(--primary-color);
-            margin-bottom: 0.5rem;
-        }
-        
-        input, select, textarea {
-            width: 100%;
-            padding: 0.75rem;
-            border: 2px solid var(--light-green);
-            border-radius: var(--border-radius);
-            font-size: 1rem;
-            transition: var(--transition);
-        }
-        
-        input:focus, select:focus, textarea:focus {
-            outline: none;
-            border-color: var(--primary-color);
-        }
-        
-        textarea {
-            resize: vertical;
-            min-height: 100px;
-        }
-        
-        .btn {
-            display: inline-block;
-            padding: 0.75rem 1.5rem;
-            border: none;
-            border-radius: var(--border-radius);
-            font-weight: 500;
-            text-decoration: none;
-            cursor: pointer;
-            transition: var(--transition);
-            font-size: 1rem;
-            margin: 0.5rem;
-        }
-        
-        .btn-primary {
-            background: var(--primary-color);
-            color: var(--white);
-        }
-        
-        .btn-primary:hover { background: var(--primary-dark); }
-        
-        .btn-secondary {
-            background: transparent;
-            color: var(--primary-color);
-            border: 2px solid var(--primary-color);
-        }
-        
-        .btn-secondary:hover {
-            background: var(--primary-color);
-            color: var(--white);
-        }
-        
-        .form-buttons {
-            text-align: center;
-            margin-top: 2rem;
-        }
-        
-        .success-message {
-            background: var(--light-green);
-            color: var(--primary-color);
-            padding: 1rem;
-            border-radius: var(--border-radius);
-            margin-bottom: 2rem;
-            text-align: center;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('add_trade.css') }}">
 </head>
 <body>
     <div class="container">
         <div class="form-container">
             <h1>🌱 Add New Trade Listing</h1>
             
+            {% if error %}
+            <div class="error-message">
+                ⚠️ {{ error }}
+            </div>
+            {% endif %}
+
             {% if success %}
             <div class="success-message">
                 ✅ Trade listing added successfully! <a href="/">View all trades</a>
+                {% if duplicate_of %}
+                <br>It closely matches your listing #{{ duplicate_of }}, so it has been marked as a repost of it.
+                {% endif %}
             </div>
             {% endif %}
             
@@ -573,18 +343,202 @@ ADD_TRADE_TEMPLATE = """
 </html>
 """
 
+# Compile the page templates once; recompiled on change when auto-reload is on
+template_cache = TemplateCache(app.jinja_env)
+template_cache.register('index', lambda: HTML_TEMPLATE)
+template_cache.register('add_trade', lambda: ADD_TRADE_TEMPLATE)
+template_cache.register('trade_card', lambda: TRADE_CARD_TEMPLATE)
+
+# Exports and bodies too large for response_cache are streamed in batches
+# of this many trades so memory stays flat; STREAM_RESPONSES=0 (or
+# ?stream=0) buffers them instead
+STREAM_BATCH = 100
+STREAM_RESPONSES = os.environ.get('STREAM_RESPONSES', '1').lower() in ('1', 'true', 'yes')
+
+def wants_stream():
+    return request.args.get('stream', '1' if STREAM_RESPONSES else '0') not in ('0', 'false', 'no')
+
+# Rendered trade cards keyed by trade id, stamped with the card template
+# version.  When the cards outgrow CARD_CACHE_BYTES the newest ones are
+# kept, so a render after a new listing still hits on every card that
+# fits; for a render that costs one card per new listing, size it to the
+# whole grid (about 1.1 KiB a card, 110 MiB at 100k listings).
+card_cache = FragmentCache(max_bytes=int(os.environ.get('CARD_CACHE_BYTES', 8 * 1024 * 1024)))
+
+def render_trade_cards(trades):
+    """Trades grid HTML from cached per-trade fragments, in STREAM_BATCH chunks"""
+    template = template_cache.get('trade_card')
+    version = template_cache.version('trade_card')
+
+    def render(trade):
+        with metrics.time(metrics.template_seconds, 'trade_card'):
+            return template.render(trade=trade)
+
+    batch = []
+    for trade in trades:
+        batch.append(card_cache.get_or_render(trade.id, version, lambda: render(trade)))
+        if len(batch) == STREAM_BATCH:
+            yield Markup(''.join(batch))
+            batch = []
+    if batch:
+        yield Markup(''.join(batch))
+
+# Whole bodies of the main page and the full /api/trades list, stamped with
+# the dataset version.  With the SQLite store every worker also shares them
+# through SHARED_CACHE (file by default, in SHARED_CACHE_DIR next to the
+# database, or redis); the memory store's versions are per process, so its
+# bodies stay local.
+response_cache = ResponseCache(
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_BYTES', 64 * 1024 * 1024)),
+    shared=create_shared_tier(
+        getattr(store, 'path', '') + '.cache',
+        default='file' if isinstance(store, SQLiteTradeStore) else 'none'),
+    lock_timeout=float(os.environ.get('RESPONSE_REBUILD_TIMEOUT', 10)))
+
+def cached_response(key, version, build_chunks, mimetype):
+    """Body for ``key`` at ``version`` from response_cache, built once on a miss
+
+    The first request to miss takes the rebuild lock and builds the body;
+    concurrent misses in this or any other worker wait for it and serve
+    the cached bytes, so a write never sets off one rebuild per worker or
+    per request.  A body too large to cache is streamed (when
+    wants_stream()) without the lock, since waiting would gain nothing; a
+    build under the lock that outgrows the cache releases it and streams
+    the rest, so even a worker's first build of a large body never holds
+    more than ``max_bytes`` of it.
+    """
+    body = response_cache.get(key, version)
+    if body is not None:
+        return app.response_class(body, mimetype=mimetype)
+
+    chunks = None
+    if response_cache.fits(key):
+        release = response_cache.acquire(key)
+        try:
+            body = response_cache.get(key, version)
+            if body is None:
+                chunks = response_cache.filling(key, version, build_chunks())
+                head, size = [], 0
+                for chunk in chunks:
+                    head.append(chunk)
+                    size += len(chunk)
+                    if size > response_cache.max_bytes:
+                        chunks = chain(head, chunks)
+                        break
+                else:
+                    body, chunks = b''.join(head), None
+        finally:
+            if release is not None:
+                release()
+        if chunks is None:
+            return app.response_class(body, mimetype=mimetype)
+    else:
+        chunks = response_cache.filling(key, version, build_chunks())
+
+    if wants_stream():
+        return app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    return app.response_class(b''.join(chunks), mimetype=mimetype)
+
+def cache_counters():
+    counters = {}
+    for name, cache in (('template', template_cache), ('trade_card', card_cache)):
+        counters[(('cache', name), ('result', 'hit'))] = cache.hits
+        counters[(('cache', name), ('result', 'miss'))] = cache.misses
+    for (name, result), count in response_cache.counters().items():
+        counters[(('cache', name), ('result', result))] = count
+    return counters
+
+metrics.register_gauge('cache_lookups', 'Template and fragment cache lookups by result.',
+                       cache_counters)
+
+# Write admission: per-client token buckets keyed by IP and contact email
+# (RATE_LIMIT_IP, RATE_LIMIT_EMAIL; RATE_LIMIT_BACKEND=redis shares them
+# across workers) and a bounded queue in front of the store, so a burst of
+# posts waits on WRITE_CONCURRENCY slots instead of every request thread
+rate_limiter = RateLimiter.from_environ()
+write_gate = WriteGate.from_environ()
+
+def write_rejections():
+    counters = {(('reason', 'rate_limit_' + name),): count
+                for name, count in rate_limiter.limited.items()}
+    counters[(('reason', 'queue_full'),)] = write_gate.rejected
+    return counters
+
+metrics.register_gauge('write_rejections', 'Writes turned away by rate limits or a full write queue.',
+                       write_rejections)
+
+# Cache-Control per route.  The page revalidates on every view (cheap 304s);
+# API pollers may reuse a copy for a few seconds; form posts are never stored.
+CACHE_CONTROL = {
+    'index': 'no-cache',
+    'api_trades': 'public, max-age=5, must-revalidate',
+    'add_trade': 'no-store',
+}
+
+def dataset_etag(*parts):
+    """Strong ETag value for the current dataset version plus ``parts``"""
+    return '-'.join(str(part) for part in (store.version(),) + parts)
+
+def conditional_response(etag, cache_control, build):
+    """Answer 304 when the client's copy is current, else ``build()`` it
+
+    ``build`` is only called for a miss, so an unchanged dataset costs
+    neither a render nor a serialization.
+    """
+    # Last-Modified has whole seconds.  While the last write's second is
+    # still running another write can land in it unseen, so date the copy
+    # a second early: a client revalidating with only If-Modified-Since
+    # then gets a full response rather than a 304 for stale data.
+    modified = int(store.last_modified())
+    if time.time() < modified + 1:
+        modified -= 1
+    last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+    response = app.response_class(status=304) if fresh else app.make_response(build())
+    if response.status_code in (200, 304):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = cache_control
+    return response
+
 @app.route('/')
 def index():
     """Main page displaying all trades"""
-    return render_template_string(HTML_TEMPLATE, trades=trades_data)
+    return conditional_response(
+        dataset_etag(template_cache.version('index'), template_cache.version('trade_card'),
+                     assets.version),
+        CACHE_CONTROL['index'],
+        build_index)
+
+def build_index():
+    """The main page from response_cache; a rebuild flushes the head before the cards"""
+    template = template_cache.get('index')
+    version = (store.version(), template_cache.version('index'),
+               template_cache.version('trade_card'), assets.version)
+
+    def render():
+        for chunk in stream_template(template, trade_cards=render_trade_cards(store.iter_all())):
+            yield chunk.encode('utf-8')
+
+    return cached_response('index', version, render, 'text/html; charset=utf-8')
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_trade():
     """Add new trade listing"""
     if request.method == 'POST':
+        wait = rate_limiter.check(ip=request.remote_addr,
+                                  email=request.form.get('contact_email', '').strip().lower())
+        if wait:
+            return render_add_trade(
+                status=429, retry_after=wait,
+                error='Too many listings submitted. Please wait a moment and try again.')
+
         # Get form data
         new_trade = {
-            'id': len(trades_data) + 1,
             'title': request.form.get('title', '').strip(),
             'category': request.form.get('category', '').strip(),
             'offering': request.form.get('offering', '').strip(),
@@ -598,18 +552,654 @@ def add_trade():
         }
         
         # Simple validation
-        if all([new_trade['title'], new_trade['category'], new_trade['offering'], 
-                new_trade['seeking'], new_trade['contact_name'], new_trade['contact_email']]):
-            trades_data.insert(0, new_trade)  # Add to beginning of list
-            return render_template_string(ADD_TRADE_TEMPLATE, success=True)
+        if not missing_fields(new_trade):
+            duplicate = None
+            if DUPLICATE_MODE != 'off':
+                sync_duplicates_for_check()
+                duplicate = find_duplicate(Fingerprint(new_trade))
+            if duplicate is not None:
+                count_duplicate()
+                if DUPLICATE_MODE == 'reject':
+                    return render_add_trade(
+                        status=409,
+                        error='You already have a listing like this one (#%d). '
+                              'Please update it instead of posting it again.' % duplicate[0])
+                new_trade['duplicate_of'] = duplicate[0]
+            try:
+                with write_gate:
+                    new_trade = store.add(new_trade)
+                enqueue_post_submit([new_trade])
+                trade_feed.notify()
+            except Overloaded as exc:
+                return render_add_trade(
+                    status=503, retry_after=exc.retry_after,
+                    error='The site is busy right now. Please try again in a few seconds.')
+            return render_add_trade(success=True, duplicate_of=new_trade.duplicate_of)
     
-    return render_template_string(ADD_TRADE_TEMPLATE)
+    return render_add_trade()
+
+# Fields a listing cannot be saved without, from the form or the bulk API
+REQUIRED_FIELDS = ('title', 'category', 'offering', 'seeking', 'contact_name', 'contact_email')
+
+def missing_fields(trade):
+    """Required fields that are absent or blank in ``trade``"""
+    return [field for field in REQUIRED_FIELDS if not trade.get(field)]
+
+def render_add_trade(status=200, retry_after=None, **context):
+    """Render the add-trade form; it carries per-post state, so never cache it"""
+    response = app.make_response(
+        (render_template(template_cache.get('add_trade'), **context), status))
+    response.headers['Cache-Control'] = CACHE_CONTROL['add_trade']
+    if retry_after:
+        response.headers['Retry-After'] = retry_after_header(retry_after)
+    return response
+
+# Live feed behind /api/trades/stream.  Every open stream holds a request
+# thread, so serve it with WORKER_CLASS=gevent when many clients listen.
+# Events carry the card fields only (LIST_FIELDS in script.js); contact
+# details stay behind /api/trades/<id> as they do for the list.
+STREAM_FIELDS = ('id', 'title', 'category', 'offering', 'seeking', 'description', 'location',
+                 'created_at')
+
+def stream_event_data(trade):
+    return app.json.dump_bytes({field: trade[field] for field in STREAM_FIELDS}).decode('utf-8')
+
+trade_feed = TradeFeed(store, stream_event_data,
+                       buffer_size=int(os.environ.get('SSE_BUFFER', 1000)),
+                       poll_interval=float(os.environ.get('SSE_POLL_SECONDS', 2)))
+SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 300))
+SSE_RETRY_MS = 3000
+
+metrics.register_gauge('jobs', 'Background jobs by status.',
+                       lambda: {(('status', status),): count
+                                for status, count in job_queue.counts().items()})
+
+metrics.register_gauge('duplicates', 'Reposts detected at insert time, by outcome.',
+                       lambda: {(('outcome', outcome),): count
+                                for outcome, count in duplicates_found.items()})
+
+metrics.register_gauge('stream_subscribers', 'Open /api/trades/stream connections.',
+                       lambda: {(): trade_feed.subscribers})
+
+# Fields a trade record may be projected to with /api/trades?fields=
+TRADE_FIELDS = TRADE_COLUMNS
+# Fields a listing is written with; the store sets id and duplicate_of
+INPUT_FIELDS = tuple(field for field in TRADE_FIELDS if field not in ('id', 'duplicate_of'))
+PAGED_PARAMS = ('limit', 'after_id', 'fields', 'category', 'location')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Change-log entries read per /api/trades?since= call
+MAX_SYNC_CHANGES = 1000
+
+def api_error(message, status=400, retry_after=None):
+    """JSON error body used by the API routes"""
+    response = jsonify({'error': message})
+    response.status_code = status
+    if retry_after:
+        response.headers['Retry-After'] = retry_after_header(retry_after)
+    return response
+
+def find_trade(trade_id):
+    """Look up a single trade by id, or None"""
+    return store.get(trade_id)
+
+def category_facets(location=None):
+    """Per-category trade counts, listing every category even when empty"""
+    counts = store.facets(location)
+    facets = {category: counts.pop(category, 0) for category in TRADE_CATEGORIES}
+    facets.update(counts)
+    return facets
+
+def parse_fields(value):
+    """Validate a comma-separated ``fields=`` projection"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in TRADE_FIELDS]
+    if unknown:
+        raise ValueError('unknown field(s): ' + ', '.join(unknown))
+    return fields
 
 @app.route('/api/trades')
 def api_trades():
-    """API endpoint for trades (for AJAX functionality)"""
-    return jsonify(trades_data)
+    """API endpoint for trades (for AJAX functionality)
+
+    Without query parameters the full list is returned as before.  With
+    ``limit``, ``after_id`` or ``fields`` the newest-first list is paged by
+    cursor: pass the ``next_after_id`` of one page as ``after_id`` for the next.
+    ``category`` and ``location`` filter the page through the store's
+    indexes, and per-category ``facets`` (within the location) come back too.
+    Pages carry the dataset ``version``; ``since=<version>`` then returns
+    only what changed after it (see changes_response()).
+    """
+    return conditional_response(dataset_etag(), CACHE_CONTROL['api_trades'], build_trades_response)
+
+def build_trades_response():
+    """Body of /api/trades for the current query string"""
+    args = request.args
+    if 'since' in args:
+        return changes_response()
+    if not any(key in args for key in PAGED_PARAMS):
+        return full_list_response()
+
+    category = args.get('category') or None
+    if category == 'all':
+        category = None
+    location = args.get('location') or None
+
+    try:
+        limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        after_id = args.get('after_id', type=int)
+        fields = parse_fields(args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+
+    # Read first: a trade added meanwhile is then repeated by a later
+    # ?since= sync rather than missed
+    version = store.version()
+    try:
+        page = store.page(after_id=after_id, limit=limit + 1, category=category, location=location)
+    except KeyError:
+        return api_error('unknown after_id: %d' % after_id)
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_after_id = page[-1].id if has_more else None
+    if fields:
+        page = [{field: trade[field] for field in fields} for trade in page]
+    return jsonify({
+        'trades': page,
+        'next_after_id': next_after_id,
+        'facets': {'category': category_facets(location)},
+        'version': version,
+    })
+
+def changes_response():
+    """Inserts and deletes after ``?since=<version>``, for clients syncing a copy
+
+    A trade both added and removed inside the window is left out.  At most
+    ``limit`` log entries are read per call; with ``more`` set, call again
+    with the returned ``version``.  410 means the log does not reach back
+    that far and the client should reload the list.
+    """
+    args = request.args
+    since = args.get('since', type=int)
+    if since is None:
+        return api_error('since must be a dataset version')
+    try:
+        limit = min(max(args.get('limit', MAX_SYNC_CHANGES, type=int), 1), MAX_SYNC_CHANGES)
+        fields = parse_fields(args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+
+    try:
+        changes = store.changes(since, limit=limit + 1)
+    except KeyError:
+        return api_error('changes since version %d are not available; reload the list' % since, 410)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    inserted, deleted = {}, set()
+    for _version, op, trade_id in changes:
+        if op == 'insert':
+            inserted[trade_id] = None
+        elif trade_id in inserted:
+            del inserted[trade_id]
+        else:
+            deleted.add(trade_id)
+
+    # Trades deleted after the window are missing here; a later sync
+    # reports the delete
+    found = store.get_many(inserted)
+    trades = [found[trade_id] for trade_id in inserted if trade_id in found]
+    if fields:
+        trades = [{field: trade[field] for field in fields} for trade in trades]
+    return jsonify({
+        'version': changes[-1][0] if changes else since,
+        'inserted': trades,
+        'deleted': sorted(deleted),
+        'more': has_more,
+    })
+
+def full_list_response():
+    """Every trade as a JSON array, from response_cache when it is current
+
+    A miss serializes the list once and leaves the bytes in the cache, so
+    until the next insert or delete the list costs one copy.
+    """
+    return cached_response('trades_json', store.version(),
+                           lambda: json_array_chunks(store.iter_all()), 'application/json')
+
+def json_array_chunks(trades):
+    """Compact JSON array of ``trades``, serialized STREAM_BATCH trades at a time"""
+    dump = app.json.dump_bytes
+    separator = b'['
+    batch = []
+    for trade in trades:
+        batch.append(dump(trade))
+        if len(batch) == STREAM_BATCH:
+            yield separator + b','.join(batch)
+            separator, batch = b',', []
+    if batch:
+        yield separator + b','.join(batch) + b']\n'
+    else:
+        yield b'[]\n' if separator == b'[' else b']\n'
+
+@app.route('/api/trades/export')
+def api_trades_export():
+    """Every trade (optionally filtered) as NDJSON, one record per line"""
+    category = request.args.get('category') or None
+    if category == 'all':
+        category = None
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+
+    location = request.args.get('location') or None
+
+    def generate():
+        dump = app.json.dump_bytes
+        batch = []
+        for trade in store.iter_all(category=category, location=location):
+            if fields:
+                trade = {field: trade[field] for field in fields}
+            batch.append(dump(trade) + b'\n')
+            if len(batch) == STREAM_BATCH:
+                yield b''.join(batch)
+                batch = []
+        if batch:
+            yield b''.join(batch)
+
+    response = app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename="trades.ndjson"'
+    return response
+
+@app.route('/api/trades/stream')
+def api_trades_stream():
+    """Server-sent events for listings as they are added
+
+    Each new trade arrives as an ``event: trade`` whose ``id`` is the trade
+    id and whose ``data`` is the trade JSON without contact details.
+    EventSource reconnects with ``Last-Event-ID`` on its own; a first
+    connection may pass ``?last_event_id=`` instead, and without either
+    only trades added from now on are sent.  A ``reset`` event means the client fell too far behind
+    and should reload /api/trades.  Streams close after SSE_MAX_SECONDS so
+    workers recycle; browsers simply reconnect.
+    """
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        cursor = int(cursor) if cursor else trade_feed.last_event_id()
+    except ValueError:
+        return api_error('Last-Event-ID must be a trade id')
+
+    def generate():
+        yield 'retry: %d\n\n' % SSE_RETRY_MS
+        for event, trade_id, data in trade_feed.events(
+                cursor, keepalive=SSE_KEEPALIVE_SECONDS, max_seconds=SSE_MAX_SECONDS):
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield 'event: %s\nid: %d\ndata: %s\n\n' % (event, trade_id, data)
+
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/search')
+def api_search():
+    """Ranked full-text search over title, offering, seeking and description
+
+    Every query term also matches as a prefix so the endpoint can back a
+    type-ahead box.  ``category`` narrows results and ``fields`` projects
+    them the same way as /api/trades.
+    """
+    sync_for_read()
+    query = request.args.get('q', '')
+    category = request.args.get('category')
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+
+    if category in ('', 'all'):
+        category = None
+
+    ranked = search_index.search(query, limit=limit, category=category)
+    found = store.get_many(trade_id for trade_id, _ in ranked)
+    results = []
+    for trade_id, score in ranked:
+        trade = found.get(trade_id)
+        if trade is None:
+            continue
+        if fields:
+            trade = {field: trade[field] for field in fields}
+        results.append(trade)
+    return jsonify({'query': query, 'trades': results})
+
+# Largest radius /api/trades/nearby searches
+MAX_NEARBY_KM = 500.0
+DEFAULT_NEARBY_KM = 25.0
+
+@app.route('/api/trades/nearby')
+def api_trades_nearby():
+    """Trades within ``radius_km`` of a point, nearest first
+
+    The point is ``lat`` and ``lon``, or ``near=<city, state or ZIP>``
+    resolved through the same offline gazetteer that geocodes listings.
+    Each trade carries its ``distance_km``; ``category``, ``limit`` and
+    ``fields`` work as for /api/search.  Trades whose location did not
+    geocode to a city or ZIP code never match.
+    """
+    sync_for_read()
+    args = request.args
+    try:
+        fields = parse_fields(args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+    if 'near' in args:
+        point = geocode(args['near'])
+        if point is None:
+            return api_error('no city or ZIP code found in: %s' % args['near'], 404)
+        lat, lon = point
+    else:
+        lat = args.get('lat', type=float)
+        lon = args.get('lon', type=float)
+        if lat is None or lon is None:
+            return api_error('lat and lon must be given as numbers, or near as a place')
+    try:
+        radius_km = float(args.get('radius_km', DEFAULT_NEARBY_KM))
+    except ValueError:
+        return api_error('radius_km must be a number')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return api_error('lat must be within ±90 and lon within ±180')
+    if not 0 < radius_km <= MAX_NEARBY_KM:
+        return api_error('radius_km must be above 0 and at most %g' % MAX_NEARBY_KM)
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    category = args.get('category')
+    if category == 'all':
+        category = None
+
+    results = []
+    for distance, trade in nearby_trades(lat, lon, radius_km, limit, category):
+        record = trade.to_dict() if fields is None else {field: trade[field] for field in fields}
+        record['distance_km'] = round(distance, 2)
+        results.append(record)
+    return jsonify({'origin': {'lat': lat, 'lon': lon}, 'radius_km': radius_km, 'trades': results})
+
+def nearby_trades(lat, lon, radius_km, limit, category=None):
+    """Up to ``limit`` ``(distance_km, trade)`` pairs from the proximity index
+
+    Hits are fetched from the store a page at a time, skipping deleted
+    trades and other categories, so only the trades returned are loaded.
+    """
+    hits = spatial_index.nearby(lat, lon, radius_km)
+    results = []
+    while len(results) < limit:
+        batch = list(islice(hits, limit))
+        if not batch:
+            break
+        found = store.get_many(trade_id for _, trade_id in batch)
+        for distance, trade_id in batch:
+            trade = found.get(trade_id)
+            if trade is not None and (category is None or trade.category == category):
+                results.append((distance, trade))
+                if len(results) == limit:
+                    break
+    return results
+
+@app.route('/api/trades/<int:trade_id>/matches')
+def api_trade_matches(trade_id):
+    """Trades that complement this one, best first
+
+    A match offers something this trade seeks, seeks something it offers,
+    or both; ``they_offer`` and ``they_seek`` list the shared terms.
+    ``limit`` (at most TOP_K) and ``fields`` work as for /api/search.
+    """
+    sync_for_read()
+    trade = find_trade(trade_id)
+    if trade is None:
+        return api_error('trade not found', 404)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return api_error(str(exc))
+    limit = min(max(request.args.get('limit', 10, type=int), 1), TOP_K)
+
+    try:
+        ranked = match_index.matches(trade_id)
+    except KeyError:
+        # Not indexed yet: a large import is still being caught up
+        return api_error('trade is still being indexed', 503, retry_after=INDEX_SYNC_SECONDS)
+    found = store.get_many(other for other, _ in ranked)
+
+    results = []
+    for other, score in ranked:
+        match = found.get(other)
+        if match is None:
+            continue
+        record = match.to_dict() if fields is None else {field: match[field] for field in fields}
+        record['score'] = round(score, 3)
+        record['they_offer'], record['they_seek'] = match_index.shared_terms(trade_id, other)
+        results.append(record)
+        if len(results) == limit:
+            break
+    return jsonify({'trade_id': trade_id, 'matches': results})
+
+@app.route('/api/trades/<int:trade_id>/duplicates')
+def api_trade_duplicates(trade_id):
+    """Listings from the same contact email whose text nearly repeats this one"""
+    if DUPLICATE_MODE == 'off':
+        return api_error('duplicate detection is off', 404)
+    sync_duplicates_for_check()
+    trade = find_trade(trade_id)
+    if trade is None:
+        return api_error('trade not found', 404)
+    matches = duplicate_index.matches(Fingerprint(trade), store.get_many)
+    return jsonify({
+        'trade_id': trade_id,
+        'duplicates': [{'id': other, 'similarity': round(score, 3)}
+                       for other, score in matches if other != trade_id],
+    })
+
+@app.route('/api/jobs')
+def api_jobs():
+    """Background job counts by status, plus this process's worker totals"""
+    return jsonify({
+        'counts': job_queue.counts(),
+        'workers': job_workers.threads,
+        'processed': job_workers.processed,
+        'failures': job_workers.failures,
+    })
+
+@app.route('/api/jobs/<int:job_id>')
+def api_job(job_id):
+    """Status of one background job: queued, running, done or failed"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return api_error('job not found', 404)
+    return jsonify(job)
+
+@app.route('/api/trades/<int:trade_id>')
+def api_trade(trade_id):
+    """Full record for a single trade, including contact details"""
+    trade = find_trade(trade_id)
+    if trade is None:
+        return api_error('trade not found', 404)
+    return jsonify(trade)
+
+# Largest batch /api/trades/bulk takes in one request, in rows and in body
+# bytes.  A declared Content-Length is checked before the body is read, and
+# Flask's MAX_CONTENT_LENGTH stops reading a chunked body one byte past the
+# limit, so no route ever holds a larger body.
+MAX_BULK_ROWS = int(os.environ.get('MAX_BULK_ROWS', 50_000))
+MAX_BULK_BYTES = int(os.environ.get('MAX_BULK_BYTES', 32 * 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_BULK_BYTES + 1
+
+@app.route('/api/trades/bulk', methods=['POST'])
+def api_trades_bulk():
+    """Import many trades in one request and one transaction
+
+    The body is a JSON array of trade objects, or NDJSON (one object per
+    line) when sent as ``application/x-ndjson``.  Every row is checked
+    against the add-trade rules before anything is written; the valid rows
+    are then inserted together and the invalid ones reported as
+    ``{"row": n, "errors": [...]}`` with ``n`` counted from 0.  A body
+    over MAX_BULK_BYTES, or over MAX_BULK_ROWS rows, gets a 413.  With
+    ``?atomic=1`` a single invalid row rejects the whole batch.  Reposts
+    of stored listings or of earlier rows are rejected as errors under
+    DUPLICATE_MODE=reject; in flag mode they are stored with their
+    ``duplicate_of`` and listed under ``duplicates``.
+    """
+    wait = rate_limiter.check(ip=request.remote_addr)
+    if wait:
+        return api_error('rate limit exceeded', 429, retry_after=wait)
+    if (request.content_length or 0) > MAX_BULK_BYTES:
+        return api_error('at most %d bytes per request' % MAX_BULK_BYTES, 413)
+    body = request.get_data()
+    if len(body) > MAX_BULK_BYTES:  # a chunked body, cut off past the limit
+        return api_error('at most %d bytes per request' % MAX_BULK_BYTES, 413)
+    try:
+        rows = parse_bulk_body(body)
+    except ValueError as exc:
+        return api_error(str(exc))
+    if len(rows) > MAX_BULK_ROWS:
+        return api_error('at most %d trades per request' % MAX_BULK_ROWS, 413)
+
+    trades, errors, reposts, flagged = validate_bulk_rows(rows)
+    if errors and request.args.get('atomic', '0').lower() in ('1', 'true', 'yes'):
+        trades, reposts, flagged = [], {}, []
+
+    try:
+        with write_gate:
+            stored = store.add_many(trades, reposts)
+    except Overloaded as exc:
+        return api_error('too many writes in progress', 503, retry_after=exc.retry_after)
+    job_ids = enqueue_post_submit(stored) if stored else []
+    trade_feed.notify()
+    status = 201 if stored else (422 if errors else 200)
+    return jsonify({
+        'inserted': len(stored),
+        'ids': [trade.id for trade in stored],
+        'errors': errors,
+        'duplicates': [{'row': number, 'id': stored[position].id,
+                        'duplicate_of': stored[position].duplicate_of, 'similarity': similarity}
+                       for number, position, similarity in flagged],
+        'jobs': job_ids,
+    }), status
+
+def parse_bulk_body(body):
+    """Rows of a bulk import body; undecodable NDJSON lines come back as None"""
+    if request.mimetype == 'application/x-ndjson':
+        rows = []
+        for line in body.splitlines():
+            if line.strip():
+                try:
+                    rows.append(app.json.loads(line))
+                except ValueError:
+                    rows.append(None)
+        return rows
+
+    try:
+        rows = app.json.loads(body)
+    except ValueError:
+        raise ValueError('body must be a JSON array or NDJSON') from None
+    if not isinstance(rows, list):
+        raise ValueError('body must be a JSON array of trades')
+    return rows
+
+def validate_bulk_rows(rows):
+    """Split decoded rows into insertable trades and per-row errors
+
+    Every row is checked before the store is touched, so a bad row never
+    leaves a batch half written.  Strings are stripped like form input;
+    ``id`` and ``duplicate_of`` are ignored (the store allocates ids and
+    flags reposts itself) and a missing ``created_at`` defaults to today.
+    Dates after today are refused: the SQLite store lists newest
+    ``created_at`` first, so a future date would pin a row to the top of
+    every list.
+
+    Also returned, for store.add_many(): ``reposts``, mapping a trade's
+    position to that of the earlier row in the batch it reposts, and
+    ``flagged``, ``(row, position, similarity)`` for every repost let
+    through in flag mode.  Reposts of stored listings carry their
+    ``duplicate_of`` already.
+    """
+    allowed = set(TRADE_FIELDS)
+    today = datetime.now().strftime('%Y-%m-%d')
+    trades, errors, reposts, flagged = [], [], {}, []
+    # Valid rows so far, so a batch cannot repost its own rows either
+    batch_index, batch_rows = NearDuplicateIndex(duplicate_index.threshold), {}
+    positions = {}
+    if DUPLICATE_MODE != 'off':
+        sync_duplicates_for_check()
+    for number, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': ['not a JSON object']})
+            continue
+
+        problems = ['unknown field: %s' % field for field in row if field not in allowed]
+        trade = {}
+        for field in INPUT_FIELDS:
+            value = row.get(field, '')
+            if isinstance(value, str):
+                trade[field] = value.strip()
+            else:
+                problems.append('%s must be a string' % field)
+        problems.extend('missing %s' % field for field in missing_fields(trade)
+                        if field in trade)
+
+        created_at = trade.get('created_at')
+        if created_at == '':
+            trade['created_at'] = today
+        elif created_at is not None and not valid_date(created_at):
+            problems.append('created_at must be a YYYY-MM-DD date')
+        elif created_at is not None and created_at > today:
+            problems.append('created_at cannot be in the future')
+
+        if not problems and DUPLICATE_MODE != 'off':
+            fingerprint = Fingerprint(trade)
+            original_row = None
+            duplicate = find_duplicate(fingerprint)
+            if duplicate is not None:
+                reason = 'duplicate of trade %d' % duplicate[0]
+            else:
+                duplicate = batch_index.find(
+                    fingerprint, lambda numbers: {row: batch_rows[row] for row in numbers})
+                if duplicate is not None:
+                    original_row = duplicate[0]
+                    reason = 'duplicate of row %d' % original_row
+            if duplicate is not None:
+                count_duplicate()
+                if DUPLICATE_MODE == 'reject':
+                    problems.append(reason)
+                else:
+                    if original_row is None:
+                        trade['duplicate_of'] = duplicate[0]
+                    else:
+                        reposts[len(trades)] = positions[original_row]
+                    flagged.append((number, len(trades), round(duplicate[1], 3)))
+            if not problems:
+                batch_index.add(number, fingerprint)
+                batch_rows[number] = trade
+                positions[number] = len(trades)
+
+        if problems:
+            errors.append({'row': number, 'errors': problems})
+        else:
+            trades.append(trade)
+    return trades, errors, reposts, flagged
+
+def valid_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d') == value
+    except ValueError:
+        return False
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    debug = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Bulk import benchmark
+Times loading listings through POST /add one at a time against one
+POST /api/trades/bulk request, on a fresh SQLite file each
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from datasets import synthetic_trades
+
+
+def fresh_app():
+    os.environ['TRADE_STORE'] = 'sqlite'
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.update(RATE_LIMIT_IP='', RATE_LIMIT_EMAIL='')
+    sys.modules.pop('app', None)
+    import app as trade_app
+    return trade_app.app.test_client()
+
+
+def main():
+    count = int(os.environ.get('BENCH_TRADES', 20_000))
+    # Form posts are slow enough that a sample gives the per-row cost
+    form_count = int(os.environ.get('BENCH_FORM_POSTS', min(count, 2_000)))
+    trades = synthetic_trades(count)
+
+    client = fresh_app()
+    started = time.perf_counter()
+    for trade in trades[:form_count]:
+        client.post('/add', data=trade)
+    elapsed = time.perf_counter() - started
+    print(f"POST /add             {form_count:>7} rows  {elapsed:7.2f}s  "
+          f"{elapsed / form_count * 1e6:8.1f} us/row  (~{elapsed / form_count * count:.1f}s for {count})")
+
+    for label, kwargs in (
+            ('json', {'json': trades}),
+            ('ndjson', {'data': '\n'.join(map(json.dumps, trades)),
+                        'content_type': 'application/x-ndjson'})):
+        client = fresh_app()
+        started = time.perf_counter()
+        response = client.post('/api/trades/bulk', **kwargs)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 201 and response.json['inserted'] == count, response.json
+        print(f"POST bulk ({label:6})   {count:>7} rows  {elapsed:7.2f}s  "
+              f"{elapsed / count * 1e6:8.1f} us/row")
+
+
+if __name__ == '__main__':
+    main()
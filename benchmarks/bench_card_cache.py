@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Trade card cache benchmark
+Card cache hits and render time for / after one new listing, on a dataset
+whose cards outgrow CARD_CACHE_BYTES; exits non-zero if a render after the
+insert re-renders cards the cache was holding
+"""
+
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+os.environ.setdefault('TRADE_STORE', 'memory')
+os.environ.setdefault('DUPLICATE_MODE', 'off')
+
+from datasets import load_store, synthetic_trades
+
+import app as trade_app
+
+
+def render_index(client):
+    """Stream / to the end and return ``(seconds, card hits, card misses)``"""
+    cache = trade_app.card_cache
+    hits, misses = cache.hits, cache.misses
+    started = time.perf_counter()
+    response = client.get('/', buffered=False)
+    for _chunk in response.response:
+        pass
+    response.close()
+    return time.perf_counter() - started, cache.hits - hits, cache.misses - misses
+
+
+def main():
+    count = int(os.environ.get('BENCH_TRADES', 100_000))
+    load_store(trade_app.store, synthetic_trades(count))
+    client = trade_app.app.test_client()
+
+    cold = render_index(client)
+    kept = trade_app.card_cache.stats()['entries']
+    trade_app.store.add(trade_app.store.get(trade_app.store.last_id()))
+    after_insert = render_index(client)
+
+    total = after_insert[1] + after_insert[2]
+    print(f"{len(trade_app.store)} listings, card cache {trade_app.card_cache.stats()}")
+    for label, (seconds, hits, misses) in (('cold render', cold), ('after insert', after_insert)):
+        print(f"{label:13} {seconds * 1000:9.1f} ms  {hits:7} hits  {misses:7} misses")
+    print(f"hit rate after insert: {after_insert[1] / total:.1%} "
+          f"({kept} cards fit in CARD_CACHE_BYTES)")
+    # The new card evicts at most a couple of the oldest cached ones
+    if after_insert[1] < kept - 2:
+        print('FAIL: the render after an insert missed cards the cache held')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Insert benchmark
+Times MemoryTradeStore inserts against the old list.insert(0, ...) scheme
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import MemoryTradeStore
+
+TRADE = {
+    'title': 'Tomato Seedlings for Herbs',
+    'category': 'Plants',
+    'offering': '6 healthy tomato seedlings',
+    'seeking': 'Herb cuttings',
+    'description': '',
+    'location': 'Portland, OR',
+    'contact_name': 'Sarah Johnson',
+    'contact_email': 'sarah.j@email.com',
+    'contact_phone': '',
+    'created_at': '2025-07-08',
+}
+
+
+def bench_store(count):
+    store = MemoryTradeStore(seed=False)
+    started = time.perf_counter()
+    for _ in range(count):
+        store.add(TRADE)
+    elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for trade_id in range(1, count + 1, max(count // 1000, 1)):
+        store.get(trade_id)
+    page = store.page(limit=50)
+    page = store.page(after_id=page[-1]['id'], limit=50)
+    lookups = time.perf_counter() - started
+    return elapsed, lookups
+
+
+def bench_list(count):
+    trades = []
+    started = time.perf_counter()
+    for _ in range(count):
+        trades.insert(0, dict(TRADE, id=len(trades) + 1))
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(os.environ.get('BENCH_INSERTS', 1_000_000))
+    # list.insert(0) is quadratic; keep its run short and report per-insert cost
+    list_count = int(os.environ.get('BENCH_LIST_INSERTS', min(count, 200_000)))
+
+    elapsed, lookups = bench_store(count)
+    print(f"MemoryTradeStore.add  {count:>9} inserts  {elapsed:7.2f}s  "
+          f"{elapsed / count * 1e6:6.2f} us/insert  (1k lookups + 2 pages: {lookups * 1000:.2f} ms)")
+
+    elapsed = bench_list(list_count)
+    print(f"list.insert(0, ...)   {list_count:>9} inserts  {elapsed:7.2f}s  "
+          f"{elapsed / list_count * 1e6:6.2f} us/insert")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - JSON serialization benchmark
+Encode time of the full trade list with each JSON provider, and the cost of
+GET /api/trades cold (serializing) versus warm (cached bytes)
+"""
+
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from datasets import load_store, synthetic_trades
+from serialization import JSON_PROVIDERS, orjson
+from storage import MemoryTradeStore
+
+
+def best_of(runs, function):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    sizes = [int(size) for size in os.environ.get('BENCH_SIZES', '10000,100000').split(',')]
+    runs = int(os.environ.get('BENCH_RUNS', 5))
+    names = [name for name in JSON_PROVIDERS if name != 'orjson' or orjson is not None]
+
+    os.environ['TRADE_STORE'] = 'memory'
+    import app as trade_app
+
+    for size in sizes:
+        store = MemoryTradeStore(seed=False)
+        load_store(store, synthetic_trades(size))
+        trades = store.all()
+        print(f"{size} trades")
+
+        for name in names:
+            provider = JSON_PROVIDERS[name](trade_app.app)
+            elapsed = best_of(runs, lambda: provider.response(trades))
+            print(f"  encode {name:8} {elapsed * 1000:9.1f} ms  "
+                  f"{elapsed / size * 1e6:6.2f} us/trade")
+
+        trade_app.store = store
+        client = trade_app.app.test_client()
+        cold = best_of(runs, lambda: (trade_app.response_cache.clear(),
+                                      client.get('/api/trades?stream=0')))
+        warm = best_of(runs, lambda: client.get('/api/trades?stream=0'))
+        print(f"  GET /api/trades ({type(trade_app.app.json).__name__})  "
+              f"cold {cold * 1000:8.1f} ms  cached {warm * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Record memory benchmark
+Bytes per listing held as plain dicts versus slotted Trade records, plus
+encode time through the Flask JSON provider
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from datasets import synthetic_trades
+from models import Trade
+from serialization import TradeJSONProvider
+
+
+def fresh(value):
+    """Copy a string so it is not shared with the source dataset"""
+    return (value + '.')[:-1]
+
+
+def measure(count, build):
+    # Round-trip through JSON so every string is a distinct object, as it is
+    # when rows come from a form post or a database cursor
+    rows = json.loads(json.dumps(synthetic_trades(count)))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [build(number, row) for number, row in enumerate(rows, 1)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return records, used
+
+
+def main():
+    count = int(os.environ.get('BENCH_TRADES', 100_000))
+
+    dicts, dict_bytes = measure(count, lambda number, row: dict(
+        {key: fresh(value) for key, value in row.items()}, id=number))
+    trades, trade_bytes = measure(count, lambda number, row: Trade.from_dict(
+        {key: fresh(value) for key, value in row.items()}, id=number))
+
+    print(f"{count} listings")
+    print(f"dict records:    {dict_bytes / count:8.1f} bytes/record")
+    print(f"Trade records:   {trade_bytes / count:8.1f} bytes/record  "
+          f"({(1 - trade_bytes / dict_bytes) * 100:.0f}% smaller)")
+
+    from flask import Flask
+    app = Flask(__name__)
+    for label, provider, records in (('dicts', TradeJSONProvider(app), dicts),
+                                     ('Trade', TradeJSONProvider(app), trades)):
+        started = time.perf_counter()
+        provider.dumps(records)
+        print(f"encode {label:6} {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
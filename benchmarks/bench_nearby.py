@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Proximity search benchmark
+Radius queries through the grid index versus a haversine scan of every
+trade, and GET /api/trades/nearby end to end
+"""
+
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from datasets import load_store, synthetic_trades
+from geo import GridIndex, default_gazetteer, haversine_km
+from storage import MemoryTradeStore
+
+# Query origin and radii (downtown Portland)
+ORIGIN = (45.5152, -122.6784)
+RADII_KM = (25, 100, 500)
+
+
+def best_of(runs, function):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def scan(located, radius_km, limit):
+    hits = [(haversine_km(*ORIGIN, lat, lon), trade_id) for trade_id, lat, lon in located]
+    return sorted(hit for hit in hits if hit[0] <= radius_km)[:limit]
+
+
+def main():
+    sizes = [int(size) for size in os.environ.get('BENCH_SIZES', '10000,100000').split(',')]
+    runs = int(os.environ.get('BENCH_RUNS', 5))
+    # Spread listings over every city in the gazetteer, not just the ten
+    # the synthetic dataset uses
+    places = ['%s, %s' % city for city in default_gazetteer().cities]
+
+    os.environ['TRADE_STORE'] = 'memory'
+    import app as trade_app
+
+    for size in sizes:
+        rng = random.Random(size)
+        trades = synthetic_trades(size)
+        for trade in trades:
+            trade['location'] = rng.choice(places)
+        store = MemoryTradeStore(seed=False)
+        load_store(store, trades)
+        located = list(store.coordinates())
+        print(f"{size} trades")
+
+        index = GridIndex()
+        elapsed = best_of(1, lambda: index.add_many(located))
+        print(f"  build grid           {elapsed * 1000:9.1f} ms")
+
+        for radius in RADII_KM:
+            grid = best_of(runs, lambda: list(zip(range(50), index.nearby(*ORIGIN, radius))))
+            full = best_of(runs, lambda: scan(located, radius, 50))
+            print(f"  {radius:4d} km  grid {grid * 1000:8.2f} ms  scan {full * 1000:8.1f} ms")
+
+        trade_app.store = store
+        trade_app.spatial_index = index
+        client = trade_app.app.test_client()
+        for radius in RADII_KM:
+            url = '/api/trades/nearby?lat=%s&lon=%s&radius_km=%d' % (ORIGIN + (radius,))
+            elapsed = best_of(runs, lambda: client.get(url))
+            print(f"  GET nearby {radius:4d} km  {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
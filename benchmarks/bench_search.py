@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Search index benchmark
+Builds the inverted index over synthetic listings and times typical queries
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datasets import synthetic_trades
+from search import SearchIndex
+
+QUERIES = ('tomato', 'tom', 'basil seed', 'organic carrot', 'pru', 'lavender mint', 'zzz')
+
+
+def main():
+    count = int(os.environ.get('BENCH_TRADES', 100_000))
+    trades = [dict(trade, id=number) for number, trade in enumerate(synthetic_trades(count), 1)]
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.add_many(trades)
+    print(f"indexed {count} trades in {time.perf_counter() - started:.2f}s")
+
+    for query in QUERIES:
+        runs = 50
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query, limit=20)
+        elapsed_ms = (time.perf_counter() - started) / runs * 1000
+        print(f"{query!r:18} {elapsed_ms:8.3f} ms  ({len(results)} results)")
+
+
+if __name__ == '__main__':
+    main()
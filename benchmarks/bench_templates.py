@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Template rendering benchmark
+Compares per-request compilation against the precompiled template and
+trade card caches on /
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TRADE_STORE', 'memory')
+
+from flask import render_template, render_template_string
+
+import app as trade_app
+
+# The page as it was before cards were split out: one template, one loop
+INLINE_TEMPLATE = trade_app.HTML_TEMPLATE.replace(
+    '{{ trade_cards }}',
+    '{% for trade in trades %}' + trade_app.TRADE_CARD_TEMPLATE + '{% endfor %}')
+
+
+def run(client, seconds):
+    """Hit / repeatedly for ``seconds`` and return requests per second"""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        client.get('/')
+        count += 1
+    return count / seconds
+
+
+def swap_index(view):
+    trade_app.app.view_functions['index'] = view
+
+
+def main():
+    seconds = float(os.environ.get('BENCH_SECONDS', 3))
+    extra = int(os.environ.get('BENCH_TRADES', 0))
+    seed = trade_app.store.get(1)
+    for _ in range(extra):
+        trade_app.store.add(seed)
+
+    client = trade_app.app.test_client()
+    original = trade_app.app.view_functions['index']
+    compiled_inline = trade_app.app.jinja_env.from_string(INLINE_TEMPLATE)
+
+    results = {}
+    results['cached'] = run(client, seconds)
+    try:
+        swap_index(lambda: render_template(compiled_inline, trades=trade_app.store.all()))
+        results['compiled'] = run(client, seconds)
+        swap_index(lambda: render_template_string(INLINE_TEMPLATE, trades=trade_app.store.all()))
+        results['uncached'] = run(client, seconds)
+    finally:
+        swap_index(original)
+
+    print(f"{len(trade_app.store)} listings")
+    print(f"render_template_string:    {results['uncached']:10.1f} req/s")
+    print(f"compiled template:         {results['compiled']:10.1f} req/s")
+    print(f"template + card cache:     {results['cached']:10.1f} req/s  "
+          f"({results['cached'] / results['uncached']:.1f}x)")
+    print(f"template cache: {trade_app.template_cache.stats()}")
+    print(f"card cache:     {trade_app.card_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Garden Trade Hub - Synthetic benchmark datasets
+Deterministic trade listings in the same schema as the stored trades
+"""
+
+import datetime
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import TRADE_CATEGORIES
+
+WORDS = ('tomato seedlings basil oregano thyme rake shovel pruning shears watering can '
+         'organic carrot lettuce radish flower bulbs compost mulch pots trellis hose '
+         'pepper squash zucchini cucumber kale spinach strawberry raspberry blueberry '
+         'succulent cactus fern orchid rose tulip daffodil lavender mint sage').split()
+
+LOCATIONS = ('Portland, OR', 'Seattle, WA', 'San Francisco, CA', 'Austin, TX', 'Denver, CO',
+             'Chicago, IL', 'Boston, MA', 'Atlanta, GA', 'Minneapolis, MN', 'Phoenix, AZ')
+
+FIRST_NAMES = ('Sarah', 'Mike', 'Emily', 'Carlos', 'Priya', 'Jordan', 'Aiko', 'Sam')
+LAST_NAMES = ('Johnson', 'Chen', 'Rodriguez', 'Okafor', 'Patel', 'Kim', 'Novak', 'Reyes')
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def synthetic_trades(count, seed=42):
+    """``count`` trades without ids, oldest first"""
+    rng = random.Random(seed)
+    sentence = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    start = datetime.date(2025, 1, 1)
+    trades = []
+    for number in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        trades.append({
+            'title': sentence(4).title(),
+            'category': rng.choice(TRADE_CATEGORIES),
+            'offering': sentence(6),
+            'seeking': sentence(6),
+            'description': sentence(20),
+            'location': rng.choice(LOCATIONS),
+            'contact_name': '%s %s' % (first, last),
+            'contact_email': '%s.%s%d@email.com' % (first.lower(), last.lower(), number),
+            'contact_phone': '(503) 555-%04d' % rng.randrange(10000) if rng.random() < 0.6 else '',
+            'created_at': (start + datetime.timedelta(days=number * 365 // max(count, 1))).isoformat(),
+        })
+    return trades
+
+
+def load_store(store, trades):
+    """Insert ``trades`` into a store in one batch (one transaction for SQLite)"""
+    store.add_many(trades)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Server load test
+Starts main.py under each SERVER mode and compares throughput on one route
+
+    python benchmarks/loadtest.py [dev waitress gunicorn]
+    LOAD_PATH=/api/trades LOAD_CONCURRENCY=32 LOAD_SECONDS=10 python benchmarks/loadtest.py
+"""
+
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = int(os.environ.get('LOAD_PORT', 5077))
+PATH = os.environ.get('LOAD_PATH', '/')
+CONCURRENCY = int(os.environ.get('LOAD_CONCURRENCY', 16))
+SECONDS = float(os.environ.get('LOAD_SECONDS', 5))
+WARMUP_SECONDS = float(os.environ.get('LOAD_WARMUP_SECONDS', 2))
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start on port %d' % port)
+
+
+def client(deadline, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', PATH)
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run_clients(seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(deadline, latencies, errors))
+               for _ in range(CONCURRENCY)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def load(mode):
+    env = dict(os.environ, SERVER=mode, PORT=str(PORT), HOST='127.0.0.1', ACCESS_LOG='',
+               DATABASE_PATH=os.path.join(tempfile.mkdtemp(), 'loadtest.db'))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(PORT)
+        run_clients(WARMUP_SECONDS)  # let every worker boot and fill its caches
+        latencies, errors = run_clients(SECONDS)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    print(f"{mode:9} {len(latencies) / SECONDS:9.1f} req/s  p50 {percentile(0.50):7.2f} ms  "
+          f"p99 {percentile(0.99):7.2f} ms  errors {len(errors)}")
+
+
+def main():
+    modes = sys.argv[1:] or ['dev', 'waitress', 'gunicorn']
+    print(f"GET {PATH}  concurrency={CONCURRENCY}  {SECONDS:.0f}s per server")
+    for mode in modes:
+        load(mode)
+
+
+if __name__ == '__main__':
+    main()
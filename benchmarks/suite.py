@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Benchmark suite
+Latency percentiles, throughput and peak RSS for every route, saved as JSON
+
+    python benchmarks/suite.py                       # test client, 1k/10k/100k
+    python benchmarks/suite.py --mode live --sizes 1000,10000
+    python benchmarks/suite.py --compare benchmarks/results/<earlier>.json
+
+Test-client runs execute each (dataset, route) pair in a fresh interpreter so
+the reported peak RSS belongs to that route alone.  Live runs start main.py
+(SERVER=waitress unless set) on a prepared SQLite file and reset the server's
+peak RSS between routes where Linux allows it.
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from datasets import SIZES, load_store, synthetic_trades
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Benchmarks post far faster than any client should; lift the write limits
+UNLIMITED = {'RATE_LIMIT_IP': '', 'RATE_LIMIT_EMAIL': ''}
+
+LIST_FIELDS = 'id,title,category,offering,seeking,location,created_at'
+
+FORM = {
+    'title': 'Benchmark seedlings', 'category': 'Plants', 'offering': 'basil seedlings',
+    'seeking': 'compost', 'description': '', 'location': 'Portland, OR',
+    'contact_name': 'Bench Mark', 'contact_email': 'bench@email.com', 'contact_phone': '',
+}
+
+# (name, method, path, form body); writes run last so reads see the base dataset
+ROUTES = (
+    ('index', 'GET', '/', None),
+    ('add_form', 'GET', '/add', None),
+    ('api_trades', 'GET', '/api/trades', None),
+    ('api_trades_page', 'GET', '/api/trades?limit=50&fields=' + LIST_FIELDS, None),
+    ('api_trades_category', 'GET', '/api/trades?category=Seeds&limit=50', None),
+    ('api_trade', 'GET', '/api/trades/1', None),
+    ('api_search', 'GET', '/api/search?q=tom&limit=20', None),
+    ('add_post', 'POST', '/add', FORM),
+)
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    at = lambda p: round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': at(0.50),
+        'p95_ms': at(0.95),
+        'p99_ms': at(0.99),
+    }
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+# -- Flask test client --------------------------------------------------------
+
+def client_worker(size, route_name, max_requests, seconds):
+    """Runs inside a fresh interpreter; prints one JSON result line"""
+    os.environ['TRADE_STORE'] = 'memory'
+    os.environ['JOBS_DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    os.environ.update(UNLIMITED)
+    sys.path.insert(0, ROOT)
+    import app as trade_app
+
+    load_store(trade_app.store, synthetic_trades(size))
+    trade_app.sync_indexes()
+    baseline_rss = peak_rss_kb()
+
+    _name, method, path, form = next(route for route in ROUTES if route[0] == route_name)
+    client = trade_app.app.test_client()
+    client.open(path, method=method, data=form)  # warm caches
+
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + seconds
+    while len(latencies) < max_requests and time.perf_counter() < deadline:
+        begun = time.perf_counter()
+        response = client.open(path, method=method, data=form)
+        latencies.append(time.perf_counter() - begun)
+        assert response.status_code < 400, (path, response.status_code)
+    result = summarize(latencies, time.perf_counter() - started)
+    result.update(peak_rss_kb=peak_rss_kb(), dataset_rss_kb=baseline_rss)
+    print(json.dumps(result))
+
+
+def run_client(sizes, routes, args):
+    results = []
+    for size in sizes:
+        for name, method, path, _form in routes:
+            output = subprocess.run(
+                [sys.executable, __file__, '--worker', name, '--sizes', str(size),
+                 '--requests', str(args.requests), '--seconds', str(args.seconds)],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result.update(mode='client', size=size, route=name, method=method, path=path)
+            report(result)
+            results.append(result)
+    return results
+
+
+# -- Live server --------------------------------------------------------------
+
+def process_tree(pid):
+    """``pid`` and all of its descendants (Linux /proc only)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open('/proc/%s/stat' % entry) as handle:
+                    ppid = int(handle.read().rsplit(')', 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, ()))
+    return tree
+
+
+def reset_peak_rss(pid):
+    for member in process_tree(pid):
+        try:
+            with open('/proc/%d/clear_refs' % member, 'w') as handle:
+                handle.write('5')
+        except OSError:
+            pass
+
+
+def server_peak_rss_kb(pid):
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open('/proc/%d/status' % member) as handle:
+                for line in handle:
+                    if line.startswith('VmHWM:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total or None
+
+
+def live_load(port, method, path, form, concurrency, max_requests, seconds):
+    body = urllib.parse.urlencode(form) if form else None
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form else {}
+    latencies, lock = [], threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while time.perf_counter() < deadline:
+            with lock:
+                if len(latencies) >= max_requests:
+                    break
+            begun = time.perf_counter()
+            conn.request(method, path, body=body, headers=headers)
+            conn.getresponse().read()
+            with lock:
+                latencies.append(time.perf_counter() - begun)
+        conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_live(sizes, routes, args):
+    from storage import SQLiteTradeStore
+
+    results = []
+    for size in sizes:
+        database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        load_store(SQLiteTradeStore(database), synthetic_trades(size))
+        env = dict(os.environ, PORT=str(args.port), HOST='127.0.0.1', DATABASE_PATH=database,
+                   JOBS_DATABASE_PATH=os.path.join(os.path.dirname(database), 'jobs.db'),
+                   ACCESS_LOG='', SERVER=os.environ.get('SERVER', 'waitress'), **UNLIMITED)
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')], cwd=ROOT,
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            for name, method, path, form in routes:
+                live_load(args.port, method, path, form, 1, 3, args.seconds)  # warm up
+                reset_peak_rss(server.pid)
+                result = live_load(args.port, method, path, form, args.concurrency,
+                                   args.requests, args.seconds)
+                result.update(mode='live', size=size, route=name, method=method, path=path,
+                              server=env['SERVER'], concurrency=args.concurrency,
+                              peak_rss_kb=server_peak_rss_kb(server.pid))
+                report(result)
+                results.append(result)
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+    return results
+
+
+def wait_for_port(port, timeout=60):
+    import socket
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start on port %d' % port)
+
+
+# -- Reporting ----------------------------------------------------------------
+
+def report(result):
+    rss = result.get('peak_rss_kb')
+    print(f"{result['mode']:6} {result['size']:>7} {result['route']:20} {result['rps']:9.1f} req/s  "
+          f"p50 {result['p50_ms']:9.3f}  p95 {result['p95_ms']:9.3f}  p99 {result['p99_ms']:9.3f} ms  "
+          f"rss {rss / 1024 if rss else 0:7.1f} MiB", flush=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, results):
+    with open(baseline_path) as handle:
+        baseline = {(r['mode'], r['size'], r['route']): r for r in json.load(handle)['results']}
+    print('\nchange vs %s (p50 latency, req/s)' % baseline_path)
+    for result in results:
+        old = baseline.get((result['mode'], result['size'], result['route']))
+        if old is None:
+            continue
+        p50 = (result['p50_ms'] / old['p50_ms'] - 1) * 100 if old['p50_ms'] else 0.0
+        rps = (result['rps'] / old['rps'] - 1) * 100 if old['rps'] else 0.0
+        print(f"{result['mode']:6} {result['size']:>7} {result['route']:20} "
+              f"p50 {p50:+7.1f}%  rps {rps:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('client', 'live', 'both'), default='client')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    parser.add_argument('--routes', help='comma-separated route names (default: all)')
+    parser.add_argument('--requests', type=int, default=200, help='max requests per route')
+    parser.add_argument('--seconds', type=float, default=10.0, help='max seconds per route')
+    parser.add_argument('--concurrency', type=int, default=8, help='live-mode client threads')
+    parser.add_argument('--port', type=int, default=5088)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>-<rev>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if args.worker:
+        return client_worker(sizes[0], args.worker, args.requests, args.seconds)
+
+    routes = ROUTES
+    if args.routes:
+        wanted = args.routes.split(',')
+        routes = [route for route in ROUTES if route[0] in wanted]
+
+    results = []
+    if args.mode in ('client', 'both'):
+        results += run_client(sizes, routes, args)
+    if args.mode in ('live', 'both'):
+        results += run_live(sizes, routes, args)
+
+    revision = git_revision()
+    output = args.output or os.path.join(
+        RESULTS_DIR, '%s-%s.json' % (datetime.datetime.now().strftime('%Y%m%d-%H%M%S'), revision))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump({
+            'revision': revision,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, handle, indent=2)
+    print('\nsaved %s' % output)
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Duplicate listing detection
+MinHash/LSH index that spots reposts of the same listing at insert time,
+and a batch pass that removes them from an existing dataset
+
+    python dedup.py            report duplicate groups in the configured store
+    python dedup.py --apply    delete all but the original listing of each group
+"""
+
+import sys
+import threading
+
+from search import tokenize
+
+# Fields whose text is compared; the contact email scopes the comparison
+TEXT_FIELDS = ('title', 'offering', 'seeking', 'description')
+
+# Jaccard similarity of two listings' shingles at which one is a repost
+DEFAULT_THRESHOLD = 0.8
+
+# LSH banding: BANDS bands of ROWS MinHash values.  Listings at the default
+# threshold share a band with probability 1 - (1 - 0.8**4)**5, about 93%
+# (over 99% at 0.9), while unrelated text almost never does.
+BANDS = 5
+ROWS = 4
+SIGNATURE_SIZE = BANDS * ROWS
+
+# Candidates checked per band, newest first, so a prolific poster's
+# listings cannot make an insert slower than a fixed amount of work
+MAX_CANDIDATES = 8
+
+# Shingles are hashed with Python's own string hash: the index lives in
+# one process and is never stored, so a per-process hash seed is harmless
+_HASH_MASK = (1 << 64) - 1
+# Signature slot that no shingle hashed into (above any 64-bit hash)
+_EMPTY = 1 << 64
+
+MODES = ('off', 'flag', 'reject')
+
+
+def shingles(trade):
+    """Word and word-pair shingles of a listing's text"""
+    tokens = tokenize(' '.join(trade.get(field, '') or '' for field in TEXT_FIELDS))
+    return frozenset(tokens).union(' '.join(pair) for pair in zip(tokens, tokens[1:]))
+
+
+def similarity(first, second):
+    """Jaccard similarity of two shingle sets"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def signature(shingle_set):
+    """One-permutation MinHash signature of a shingle set.
+
+    Each shingle is hashed once; the hash picks one of ``SIGNATURE_SIZE``
+    slots and the rest of it competes for that slot's minimum, so a
+    signature costs one pass over the shingles rather than one per slot.
+    Slots no shingle landed in stay empty; very short listings collide a
+    little more readily because of them, and the exact check discards any
+    extra candidates that brings.
+    """
+    values = [_EMPTY] * SIGNATURE_SIZE
+    for shingle in shingle_set:
+        value, slot = divmod(hash(shingle) & _HASH_MASK, SIGNATURE_SIZE)
+        if value < values[slot]:
+            values[slot] = value
+    return values
+
+
+class Fingerprint:
+    """What the index needs from one listing: owner, shingles and band keys"""
+
+    __slots__ = ('owner', 'shingles', 'bands')
+
+    def __init__(self, trade):
+        self.owner = (trade.get('contact_email', '') or '').strip().lower()
+        self.shingles = shingles(trade)
+        self.bands = []
+        if self.shingles:
+            values = signature(self.shingles)
+            self.bands = [hash((band, self.owner, tuple(values[band * ROWS:(band + 1) * ROWS])))
+                          for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """LSH buckets of listing ids keyed by contact email and signature band.
+
+    Only listings from the same contact email can collide, since a repost
+    is the same gardener listing the same thing again; similar text from
+    different people is not a duplicate.  Each insert or lookup touches
+    ``BANDS`` buckets and confirms at most ``BANDS * MAX_CANDIDATES``
+    candidates by exact Jaccard similarity, whatever the size of the
+    dataset.  Buckets hold a bare id until a second listing arrives.
+
+    ``remove()`` only records ids as deleted, since the index does not keep
+    which buckets an id went into; a lookup skips them and drops them from
+    each bucket it reads, so they never take a candidate's place.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets = {}
+        self._removed = set()
+        self._lock = threading.Lock()
+
+    def add(self, trade_id, fingerprint):
+        with self._lock:
+            for key in fingerprint.bands:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    self._buckets[key] = trade_id
+                elif isinstance(bucket, list):
+                    bucket.append(trade_id)
+                else:
+                    self._buckets[key] = [bucket, trade_id]
+
+    def add_many(self, trades):
+        for trade in trades:
+            self.add(trade['id'], Fingerprint(trade))
+
+    def remove(self, trade_ids):
+        """Stop returning deleted trades as candidates"""
+        with self._lock:
+            self._removed.update(trade_ids)
+
+    def candidates(self, fingerprint):
+        """Ids sharing a band with ``fingerprint``, newest first per band"""
+        found = {}
+        with self._lock:
+            for key in fingerprint.bands:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                if not isinstance(bucket, list):
+                    bucket = [bucket]
+                stale, live = False, 0
+                for trade_id in reversed(bucket):
+                    if trade_id in self._removed:
+                        stale = True
+                        continue
+                    found[trade_id] = None
+                    live += 1
+                    if live == MAX_CANDIDATES:
+                        break
+                if stale:
+                    self._purge(key, bucket)
+        return list(found)
+
+    def _purge(self, key, bucket):
+        """Drop deleted ids from a bucket; called with the lock held"""
+        bucket = [trade_id for trade_id in bucket if trade_id not in self._removed]
+        if not bucket:
+            del self._buckets[key]
+        else:
+            self._buckets[key] = bucket if len(bucket) > 1 else bucket[0]
+
+    def matches(self, fingerprint, fetch):
+        """``(trade_id, similarity)`` of every candidate at or above the
+        threshold, most similar first.  ``fetch(ids)`` returns ``{id: trade}``
+        for the candidates that still exist."""
+        ids = self.candidates(fingerprint)
+        if not ids:
+            return []
+        scored = [(trade_id, similarity(fingerprint.shingles, shingles(trade)))
+                  for trade_id, trade in fetch(ids).items()]
+        return sorted((match for match in scored if match[1] >= self.threshold),
+                      key=lambda match: (-match[1], -match[0]))
+
+    def find(self, fingerprint, fetch):
+        """The most similar match, or None"""
+        matches = self.matches(fingerprint, fetch)
+        return matches[0] if matches else None
+
+
+def find_duplicates(trades, threshold=DEFAULT_THRESHOLD):
+    """``{trade_id: original_id}`` for every repost among ``trades``.
+
+    Trades are taken in id order and each is checked against those before
+    it, so the whole pass is linear in the number of trades; the original
+    is the first listing of each group.
+    """
+    index = NearDuplicateIndex(threshold)
+    seen = {}
+    duplicates = {}
+    for trade in sorted(trades, key=lambda trade: trade['id']):
+        fingerprint = Fingerprint(trade)
+        match = index.find(fingerprint, lambda ids: {i: seen[i] for i in ids})
+        if match is not None:
+            duplicates[trade['id']] = duplicates.get(match[0], match[0])
+        index.add(trade['id'], fingerprint)
+        seen[trade['id']] = trade
+    return duplicates
+
+
+def duplicate_groups(duplicates):
+    """``{original_id: [repost ids]}`` from find_duplicates() output"""
+    groups = {}
+    for trade_id, original in sorted(duplicates.items()):
+        groups.setdefault(original, []).append(trade_id)
+    return groups
+
+
+def main(argv):
+    from storage import create_store
+
+    apply = '--apply' in argv
+    store = create_store()
+    groups = duplicate_groups(find_duplicates(store.iter_all()))
+    removed = 0
+    for original, reposts in sorted(groups.items()):
+        # Keep the original: it is the listing flagged reposts name in
+        # duplicate_of
+        print('keep %d, %s %s' % (original, 'deleting' if apply else 'duplicates:',
+                                  ', '.join(map(str, reposts))))
+        if apply:
+            removed += sum(store.delete(trade_id) for trade_id in reposts)
+    print('%d duplicate group(s)%s' % (len(groups), ', %d listing(s) deleted' % removed if apply else ''))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
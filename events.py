@@ -0,0 +1,241 @@
+"""
+Garden Trade Hub - Live listing feed
+In-process fan-out of newly added trades to server-sent-event subscribers,
+and catch-up of per-process state with trades added by any worker
+"""
+
+import threading
+import time
+from bisect import bisect_right
+
+
+class TradeFeed:
+    """Publishes new trades to every ``/api/trades/stream`` subscriber.
+
+    A background thread follows the store: ``notify()`` wakes it right after
+    a local insert, and it also wakes every ``poll_interval`` seconds so
+    trades added by other worker processes are picked up (one cheap
+    ``store.version()`` read when nothing changed).  New trades are encoded
+    once into a ring holding at least the last ``buffer_size`` events, and
+    subscribers all wait on a single Condition and read the ring from their
+    own cursor, so an idle subscriber holds no queue of its own.  Under
+    gevent workers the thread and the Condition become greenlet primitives
+    and thousands of parked subscribers are cheap.
+
+    Event ids are trade ids.  A subscriber resuming from an id older than the
+    ring is replayed from the store, up to ``replay_limit`` trades; past
+    that it is told to ``reset`` and reload the list instead.
+    """
+
+    def __init__(self, store, encode, buffer_size=1000, replay_limit=1000, poll_interval=2.0):
+        self.store = store
+        self.encode = encode
+        self.buffer_size = buffer_size
+        self.replay_limit = replay_limit
+        self.poll_interval = poll_interval
+        self.subscribers = 0
+        self._ids = []
+        self._payloads = []
+        self._floor = None
+        self._last_id = None
+        self._version = None
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start following the store; called by the first subscriber"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._version = self.store.version()
+            self._last_id = self._floor = self.store.last_id()
+            self._thread = threading.Thread(target=self._follow, name='trade-feed', daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Wake the feed after a local insert instead of waiting for the next poll"""
+        if self._thread is not None:
+            self._wake.set()
+
+    def _follow(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._catch_up()
+            except Exception:  # keep following; the next poll retries
+                time.sleep(self.poll_interval)
+
+    def _catch_up(self):
+        version = self.store.version()
+        if version == self._version:
+            return
+        while True:
+            trades = self.store.added_after(self._last_id, limit=self.buffer_size)
+            if trades:
+                self._publish(trades)
+            if len(trades) < self.buffer_size:
+                break
+        self._version = version
+
+    def _publish(self, trades):
+        events = [(trade.id, self.encode(trade)) for trade in trades]
+        with self._changed:
+            for trade_id, payload in events:
+                self._ids.append(trade_id)
+                self._payloads.append(payload)
+            self._last_id = events[-1][0]
+            # Let the ring grow to twice its size, then drop the older half,
+            # so appends stay amortized O(1)
+            if len(self._ids) > 2 * self.buffer_size:
+                excess = len(self._ids) - self.buffer_size
+                self._floor = self._ids[excess - 1]
+                del self._ids[:excess]
+                del self._payloads[:excess]
+            self._changed.notify_all()
+
+    def last_event_id(self):
+        self.start()
+        return self._last_id
+
+    def events(self, cursor, keepalive=15.0, max_seconds=None):
+        """Yield ``(event, id, data)`` for trades after ``cursor``
+
+        ``(None, None, None)`` marks ``keepalive`` seconds without news.  The
+        stream ends after ``max_seconds``, or with a single ``reset`` event
+        when ``cursor`` is too far behind to replay.
+        """
+        self.start()
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        with self._changed:
+            self.subscribers += 1
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                with self._changed:
+                    floor = self._floor
+                    batch = None if cursor < floor else self._after(cursor)
+                    if batch == [] and self._changed.wait(keepalive):
+                        continue
+
+                if batch is None:
+                    batch = self._replay(cursor)
+                    if batch is None:
+                        yield 'reset', self._last_id, '{}'
+                        return
+                    # The replay read everything the ring has dropped
+                    cursor = floor
+                elif not batch:
+                    yield None, None, None
+
+                for trade_id, payload in batch:
+                    yield 'trade', trade_id, payload
+                    cursor = max(cursor, trade_id)
+        finally:
+            with self._changed:
+                self.subscribers -= 1
+
+    def _after(self, cursor):
+        start = bisect_right(self._ids, cursor)
+        return list(zip(self._ids[start:], self._payloads[start:]))
+
+    def _replay(self, cursor):
+        """Events after ``cursor`` read back from the store, or None if too many"""
+        trades = self.store.added_after(cursor, limit=self.replay_limit + 1)
+        if len(trades) > self.replay_limit:
+            return None
+        return [(trade.id, self.encode(trade)) for trade in trades]
+
+
+class StoreFollower:
+    """Feeds trades added to the store, by this or any other process, to ``apply``.
+
+    Each call applies whatever was added after the last trade applied, in id
+    order and ``batch_size`` at a time; when nothing was added it costs one
+    ``store.last_id()`` read.  Trades up to ``through`` (the store's last id
+    when the follower is created) are taken to be applied already, so state
+    built from the store before that point is not applied twice.
+
+    ``follow()`` keeps a daemon thread calling it, so a large import by any
+    worker is caught up in the background.  Request paths call it with
+    ``wait=False`` and a ``limit``: they pick up the few trades just added
+    but never queue behind, or take on, a long catch-up.
+
+    Deletions are not visible in the id sequence, so when ``remove`` is
+    given the background thread also reads the change log and hands it the
+    ids of deleted trades; see apply_deletes().
+    """
+
+    def __init__(self, store, apply, remove=None, batch_size=1000):
+        self.store = store
+        self.apply = apply
+        self.remove = remove
+        self.batch_size = batch_size
+        self.through = store.last_id()
+        self.version = store.version()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __call__(self, wait=True, limit=None):
+        """Apply trades added since the last call; returns how many.
+
+        With ``wait`` false, return at once if another thread is already
+        catching up; ``limit`` caps the trades this call applies.
+        """
+        if self.store.last_id() <= self.through:
+            return 0
+        if not self._lock.acquire(blocking=wait):
+            return 0
+        applied = 0
+        try:
+            while limit is None or applied < limit:
+                size = self.batch_size if limit is None else min(self.batch_size, limit - applied)
+                trades = self.store.added_after(self.through, limit=size)
+                if not trades:
+                    break
+                self.apply(trades)
+                self.through = trades[-1].id
+                applied += len(trades)
+        finally:
+            self._lock.release()
+        return applied
+
+    def apply_deletes(self):
+        """Pass trades deleted since the last call to ``remove``; returns how many"""
+        if self.remove is None or self.store.version() <= self.version:
+            return 0
+        removed = 0
+        with self._lock:
+            while True:
+                try:
+                    entries = self.store.changes(self.version, limit=self.batch_size * 10)
+                except KeyError:
+                    # The log no longer reaches back this far; reads still
+                    # skip ids whose trade is gone
+                    self.version = self.store.version()
+                    return removed
+                if not entries:
+                    return removed
+                deleted = [trade_id for _, op, trade_id in entries if op == 'delete']
+                if deleted:
+                    self.remove(deleted)
+                    removed += len(deleted)
+                self.version = entries[-1][0]
+
+    def follow(self, interval=1.0):
+        """Call this follower every ``interval`` seconds from a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._follow, args=(interval,),
+                                        name='store-follower', daemon=True)
+        self._thread.start()
+
+    def _follow(self, interval):
+        while True:
+            try:
+                self()
+                self.apply_deletes()
+            except Exception:  # a busy or briefly unavailable store; retry next time
+                pass
+            time.sleep(interval)
@@ -0,0 +1,144 @@
+"""
+Garden Trade Hub - Rendered fragment cache
+Byte-bounded cache of rendered HTML fragments such as trade cards, and
+a single-entry cache for bodies built from the whole dataset
+"""
+
+import heapq
+import threading
+
+
+class FragmentCache:
+    """Cache of rendered fragments, bounded by their total size in bytes.
+
+    Entries are keyed by an object id (a trade id) and stamped with the
+    version of the template that rendered them, so a template change turns
+    every old entry into a miss without a sweep.  ``invalidate()`` drops a
+    single entry when the object itself changes.
+
+    When full it keeps the highest keys, i.e. the newest trades, rather
+    than the most recently used ones.  Every page render reads all cards
+    in the same order, and under LRU a page larger than the cache evicts
+    exactly the cards the next render needs, so nothing ever hits; keeping
+    the newest cards instead means each render hits on as many cards as
+    fit, and a new listing costs one render plus one eviction.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        # Min-heap of cached keys, lowest (first evicted) on top; keys
+        # discarded since are skipped when they surface
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, version, render):
+        """Cached fragment for ``key`` at ``version``, rendering it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        fragment = render()
+        self.put(key, version, fragment)
+        return fragment
+
+    def put(self, key, version, fragment):
+        size = len(fragment.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            if self.size + size > self.max_bytes and key < self._lowest():
+                return  # older than everything kept
+            self._entries[key] = (version, fragment, size)
+            heapq.heappush(self._keys, key)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._discard(heapq.heappop(self._keys))
+            if len(self._keys) > 2 * len(self._entries) + 64:
+                self._keys = list(self._entries)
+                heapq.heapify(self._keys)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.size = 0
+
+    def _lowest(self):
+        """Lowest cached key; the cache must not be empty"""
+        while self._keys[0] not in self._entries:
+            heapq.heappop(self._keys)
+        return self._keys[0]
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+class SnapshotCache:
+    """One cached body stamped with the dataset version it was built from.
+
+    Holds the latest serialization of something that changes with the
+    whole dataset (the full trade list); any newer version is a miss.
+    Bodies larger than ``max_bytes`` are not kept.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        """Cached body for ``version``, or None"""
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, version, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            # Never replace a newer snapshot with one built from older data
+            if self._entry is None or self._entry[0] <= version:
+                self._entry = (version, body)
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+    def stats(self):
+        entry = self._entry
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'version': entry[0] if entry else None,
+            'bytes': len(entry[1]) if entry else 0,
+            'max_bytes': self.max_bytes,
+        }
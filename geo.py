@@ -0,0 +1,216 @@
+"""
+Garden Trade Hub - Offline geocoding and proximity search
+Resolves free-text US locations against a bundled gazetteer and finds
+trades within a radius through a grid index
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+from functools import lru_cache
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+
+EARTH_RADIUS_KM = 6371.0088
+# Length of one degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+ZIP_RE = re.compile(r'\b(\d{5})(?:-\d{4})?\b')
+# Abbreviations spelled out in the gazetteer ("St. Louis" is "Saint Louis")
+PLACE_ABBREVIATIONS = {'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount'}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def place_key(name):
+    """Lowercase, punctuation-free key for a place name"""
+    words = re.sub(r"[^a-z0-9' -]+", ' ', name.lower().replace('.', '')).split()
+    if words:
+        words[0] = PLACE_ABBREVIATIONS.get(words[0], words[0])
+    return ' '.join(words)
+
+
+class Gazetteer:
+    """Point lookups for US ZIP codes, cities and states, with no network.
+
+    ``geocode()`` tries, in order: a 5-digit ZIP anywhere in the text, then
+    "city, state" (state as a code or full name, comma optional), then a
+    bare city name (the first listed, i.e. largest, wins).  A town the
+    gazetteer does not list, or a bare state, gives None rather than the
+    state's centroid: that can be hundreds of km from the real place, and
+    distances measured from it would look precise but be wrong.  Results
+    are cached, so geocoding the same handful of locations at every insert
+    costs a dict lookup.
+    """
+
+    def __init__(self, cities=(), states=(), zips=()):
+        self.cities = {}
+        self.city_names = {}
+        for name, state, point in cities:
+            key = place_key(name)
+            self.cities.setdefault((key, state), point)
+            self.city_names.setdefault(key, point)
+        self.state_codes = {}
+        for name, state, _point in states:
+            self.state_codes[place_key(name)] = state
+            self.state_codes[state.lower()] = state
+        self.zips = {code: point for code, _state, point in zips}
+        self.geocode = lru_cache(maxsize=4096)(self._geocode)
+
+    @classmethod
+    def load(cls, path=DEFAULT_GAZETTEER_PATH):
+        """Read a ``kind,name,state,lat,lon`` CSV; ``#`` lines are comments"""
+        rows = {'city': [], 'state': [], 'zip': []}
+        with open(path, newline='', encoding='utf-8') as handle:
+            lines = (line for line in handle if not line.startswith('#'))
+            for row in csv.DictReader(lines):
+                try:
+                    rows[row['kind']].append(
+                        (row['name'], row['state'].upper(), (float(row['lat']), float(row['lon']))))
+                except (KeyError, ValueError):
+                    raise ValueError('bad gazetteer row in %s: %r' % (path, row)) from None
+        return cls(rows['city'], rows['state'], rows['zip'])
+
+    def _geocode(self, location):
+        """``(lat, lon)`` for a free-text location, or None"""
+        if not location:
+            return None
+        match = ZIP_RE.search(location)
+        if match and match.group(1) in self.zips:
+            return self.zips[match.group(1)]
+
+        parts = [place_key(ZIP_RE.sub(' ', part)) for part in location.split(',')]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None
+        city, state = parts[0], None
+        if len(parts) > 1:
+            state = self.state_codes.get(parts[-1])
+        elif ' ' in city:
+            # "Portland OR" without the comma
+            head, _, tail = city.rpartition(' ')
+            if len(tail) == 2 and tail in self.state_codes:
+                city, state = head, self.state_codes[tail]
+
+        if state is not None:
+            return self.cities.get((city, state))
+        return self.city_names.get(city)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_gazetteer():
+    """The gazetteer at GAZETTEER_PATH (the bundled one by default), loaded once"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Gazetteer.load(os.environ.get('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH))
+    return _default
+
+
+def geocode(location):
+    """``(lat, lon)`` for ``location`` from the default gazetteer, or None"""
+    return default_gazetteer().geocode(location)
+
+
+def geocode_lat(location):
+    point = geocode(location)
+    return None if point is None else point[0]
+
+
+def geocode_lon(location):
+    point = geocode(location)
+    return None if point is None else point[1]
+
+
+class GridIndex:
+    """Trades bucketed into a fixed grid of ``cell_degrees`` squares.
+
+    A radius query only visits the cells overlapping the circle's bounding
+    box.  Geocoded trades sit on a few thousand distinct points at most, so
+    each cell maps a point to the ids located there (oldest first) and the
+    distance is computed once per point rather than once per trade.
+    """
+
+    def __init__(self, cell_degrees=0.5):
+        self.cell_degrees = cell_degrees
+        self._columns = math.ceil(360 / cell_degrees)
+        self._cells = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees),
+                math.floor((lon + 180) / self.cell_degrees) % self._columns)
+
+    def add(self, trade_id, lat, lon):
+        with self._lock:
+            points = self._cells.setdefault(self._cell(lat, lon), {})
+            points.setdefault((lat, lon), []).append(trade_id)
+            self._count += 1
+
+    def add_many(self, located):
+        """Index ``(trade_id, lat, lon)`` tuples"""
+        for trade_id, lat, lon in located:
+            self.add(trade_id, lat, lon)
+
+    def remove(self, trade_ids):
+        """Drop deleted trades.  Deletions are rare, so this walks every
+        point rather than keeping a reverse map; lists are replaced, not
+        edited, so a nearby() generator already under way is unaffected."""
+        trade_ids = set(trade_ids)
+        with self._lock:
+            for points in self._cells.values():
+                for point, ids in list(points.items()):
+                    kept = [trade_id for trade_id in ids if trade_id not in trade_ids]
+                    if len(kept) == len(ids):
+                        continue
+                    self._count -= len(ids) - len(kept)
+                    if kept:
+                        points[point] = kept
+                    else:
+                        del points[point]
+
+    def nearby(self, lat, lon, radius_km):
+        """Yield ``(distance_km, trade_id)`` within ``radius_km``, nearest first
+
+        Trades at the same point come newest first.
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        widest = math.cos(math.radians(min(90.0, abs(lat) + lat_span)))
+        lon_span = 180.0 if widest < 1e-9 else min(180.0, lat_span / widest)
+        first_row, _ = self._cell(max(-90.0, lat - lat_span), lon)
+        last_row, _ = self._cell(min(90.0, lat + lat_span), lon)
+        _, first_column = self._cell(lat, lon - lon_span)
+        columns = min(self._columns, math.ceil(2 * lon_span / self.cell_degrees) + 2)
+
+        hits = []
+        with self._lock:
+            for row in range(first_row, last_row + 1):
+                for offset in range(columns):
+                    points = self._cells.get((row, (first_column + offset) % self._columns))
+                    if not points:
+                        continue
+                    for (point_lat, point_lon), ids in points.items():
+                        distance = haversine_km(lat, lon, point_lat, point_lon)
+                        if distance <= radius_km:
+                            hits.append((distance, ids, len(ids)))
+
+        hits.sort(key=lambda hit: hit[0])
+        for distance, ids, count in hits:
+            for position in range(count - 1, -1, -1):
+                yield distance, ids[position]
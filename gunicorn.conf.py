@@ -0,0 +1,34 @@
+"""
+Garden Trade Hub - Gunicorn configuration
+Every setting can be overridden through the environment
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '%s:%s' % (os.environ.get('HOST', '0.0.0.0'), os.environ.get('PORT', 5000)))
+
+# Worker processes; WEB_CONCURRENCY is the conventional override
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# sync, gthread (threads per worker) or gevent (async, for many idle clients
+# such as /api/trades/stream listeners; needs the gevent package)
+worker_class = os.environ.get('WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('THREADS', 4))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+
+# Seconds a busy worker may take, and how long SIGTERM waits for in-flight requests
+timeout = int(os.environ.get('TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('KEEPALIVE', 5))
+
+# Recycle workers now and then to bound slow leaks
+max_requests = int(os.environ.get('MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 1000))
+
+# Each worker opens its own SQLite connections, so the app is not preloaded
+preload_app = False
+
+# Access log destination; set ACCESS_LOG to an empty string to disable it
+accesslog = os.environ.get('ACCESS_LOG', '-') or None
+loglevel = os.environ.get('LOG_LEVEL', 'info')
@@ -0,0 +1,267 @@
+"""
+Garden Trade Hub - Background jobs
+Durable SQLite-backed job queue with retries, worked by a small thread pool
+in every process
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+
+DEFAULT_JOBS_PATH = 'garden_jobs.db'
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = (
+    """
+    CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL CHECK (status IN ('queued', 'running', 'done', 'failed')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        run_after REAL NOT NULL,
+        lease_until REAL,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX idx_jobs_runnable ON jobs (status, run_after);
+    """,
+)
+
+ENQUEUE_SQL = ("INSERT INTO jobs (kind, payload, status, run_after, created_at, updated_at) "
+               "VALUES (?, ?, 'queued', ?, ?, ?)")
+# Queued jobs that are due, or running ones whose worker let the lease lapse
+CLAIM_SQL = ("UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+             "updated_at = ? WHERE id = (SELECT id FROM jobs WHERE "
+             "(status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until <= ?) "
+             "ORDER BY run_after, id LIMIT 1) RETURNING id, kind, payload, attempts")
+COMPLETE_SQL = ("UPDATE jobs SET status = 'done', lease_until = NULL, last_error = NULL, "
+                "updated_at = ? WHERE id = ?")
+RETRY_SQL = ("UPDATE jobs SET status = ?, run_after = ?, lease_until = NULL, last_error = ?, "
+             "updated_at = ? WHERE id = ?")
+GET_SQL = ('SELECT id, kind, payload, status, attempts, run_after, last_error, created_at, '
+           'updated_at FROM jobs WHERE id = ?')
+COUNTS_SQL = 'SELECT status, COUNT(*) FROM jobs GROUP BY status'
+PRUNE_SQL = "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?"
+
+
+def temporary_jobs_path():
+    """A jobs database in a fresh temporary directory, removed at exit.
+
+    For stores that do not persist either (TRADE_STORE=memory).  It is a
+    real file rather than a shared-cache ``:memory:`` database, whose
+    table locks fail at once under concurrent writers instead of waiting
+    out the busy timeout.
+    """
+    directory = tempfile.mkdtemp(prefix='garden-jobs-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return os.path.join(directory, DEFAULT_JOBS_PATH)
+
+
+class JobQueue:
+    """Jobs persisted in their own SQLite file, so they survive restarts.
+
+    ``claim()`` hands a due job to exactly one worker, in any process, with
+    a single UPDATE ... RETURNING, and leases it for ``lease_seconds``: a
+    job whose worker died is claimed again once the lease lapses.  A
+    failed attempt is retried after ``backoff ** attempts`` seconds until
+    ``max_attempts`` is reached, then left ``failed`` with its last error.
+    Finished jobs are kept for ``retention`` seconds so their status can
+    still be looked up.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, max_attempts=5, backoff=2.0, lease_seconds=300.0,
+                 retention=86400.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease_seconds = lease_seconds
+        self.retention = retention
+        self._local = threading.local()
+        self._migrate()
+
+    @classmethod
+    def from_environ(cls, default_path=DEFAULT_JOBS_PATH):
+        return cls(
+            path=os.environ.get('JOBS_DATABASE_PATH', default_path),
+            max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 5)),
+            lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', 300)),
+        )
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self):
+        conn = self.connection
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in migration.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute('PRAGMA user_version = %d' % number)
+
+    def enqueue(self, kind, payload=None, delay=0.0):
+        """Persist a job and return its id"""
+        now = time.time()
+        conn = self.connection
+        with conn:
+            cursor = conn.execute(ENQUEUE_SQL, (kind, json.dumps(payload), now + delay, now, now))
+        return cursor.lastrowid
+
+    def claim(self):
+        """``(id, kind, payload, attempts)`` of the next due job, now leased; or None"""
+        now = time.time()
+        conn = self.connection
+        with conn:
+            row = conn.execute(CLAIM_SQL, (now + self.lease_seconds, now, now, now)).fetchone()
+        if row is None:
+            return None
+        job_id, kind, payload, attempts = row
+        return job_id, kind, json.loads(payload), attempts
+
+    def complete(self, job_id):
+        conn = self.connection
+        with conn:
+            conn.execute(COMPLETE_SQL, (time.time(), job_id))
+
+    def fail(self, job_id, attempts, error):
+        """Schedule a retry, or give up once ``max_attempts`` is reached"""
+        now = time.time()
+        if attempts >= self.max_attempts:
+            status, run_after = 'failed', now
+        else:
+            status, run_after = 'queued', now + self.backoff ** attempts
+        conn = self.connection
+        with conn:
+            conn.execute(RETRY_SQL, (status, run_after, error, now, job_id))
+
+    def get(self, job_id):
+        """A job's status as a dict, or None"""
+        row = self.connection.execute(GET_SQL, (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_id, kind, payload, status, attempts, run_after, error, created_at, updated_at = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'payload': json.loads(payload),
+            'status': status,
+            'attempts': attempts,
+            'run_after': run_after if status == 'queued' else None,
+            'last_error': error,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        }
+
+    def counts(self):
+        """``{status: jobs}`` for every status"""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(self.connection.execute(COUNTS_SQL).fetchall())
+        return counts
+
+    def prune(self):
+        """Forget finished jobs older than ``retention``; returns how many"""
+        conn = self.connection
+        with conn:
+            return conn.execute(PRUNE_SQL, (time.time() - self.retention,)).rowcount
+
+
+class WorkerPool:
+    """Threads that run queued jobs through ``handlers`` (``kind -> fn(payload)``).
+
+    Idle workers claim again every ``poll_interval`` seconds and then drain
+    the queue, so jobs from every process are picked up without the
+    enqueuing request having to wake (and hand the GIL to) a worker.  A
+    handler that raises has the traceback's last line recorded and the job
+    retried.  Under gevent workers the threads become greenlets.
+    """
+
+    def __init__(self, queue, handlers, threads=2, poll_interval=1.0, prune_interval=3600.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self.processed = 0
+        self.failures = 0
+        self._started = False
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    @classmethod
+    def from_environ(cls, queue, handlers):
+        return cls(queue, handlers,
+                   threads=int(os.environ.get('JOB_WORKERS', 2)),
+                   poll_interval=float(os.environ.get('JOB_POLL_SECONDS', 1)))
+
+    def start(self):
+        with self._lock:
+            if self._started or self.threads < 1:
+                return
+            self._started = True
+        for number in range(self.threads):
+            threading.Thread(target=self._run, name='job-worker-%d' % number, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error:  # the database is busy; try again on the next poll
+                job = None
+            if job is None:
+                self._maybe_prune()
+                time.sleep(self.poll_interval)
+                continue
+            self.run_job(*job)
+
+    def run_job(self, job_id, kind, payload, attempts):
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError('no handler for job kind %r' % kind)
+            handler(payload)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            error = traceback.format_exc().strip().splitlines()[-1]
+            self._record(self.queue.fail, job_id,
+                         self.queue.max_attempts if handler is None else attempts, error)
+        else:
+            self._record(self.queue.complete, job_id)
+        with self._lock:
+            self.processed += 1
+
+    def _record(self, update, *args):
+        """Record a job's outcome; if the database refuses, the job stays
+        ``running`` and is claimed and run again once its lease lapses"""
+        try:
+            update(*args)
+        except sqlite3.Error:
+            pass
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._next_prune = now + self.prune_interval
+            try:
+                self.queue.prune()
+            except sqlite3.Error:
+                pass
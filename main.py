@@ -1,4 +1,80 @@
-from app import app
+#!/usr/bin/env python3
+"""
+Garden Trade Hub - Server entry point
+Runs the app under a production WSGI server, or the Flask dev server
+
+    SERVER=gunicorn  (default) pre-forking workers, see gunicorn.conf.py
+    SERVER=waitress  single process, THREADS worker threads
+    SERVER=dev       Werkzeug development server; FLASK_DEBUG=1 for the debugger
+"""
+
+import os
+import signal
+import sys
+
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', 5000))
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+
+def run_dev():
+    from app import app
+
+    debug = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+    app.run(host=HOST, port=PORT, debug=debug, threaded=True)
+
+
+def run_waitress():
+    from waitress import create_server
+
+    from app import app
+
+    server = create_server(app, host=HOST, port=PORT,
+                           threads=int(os.environ.get('THREADS', 8)),
+                           connection_limit=int(os.environ.get('WORKER_CONNECTIONS', 1000)))
+
+    def shutdown(signum, frame):
+        server.close()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        server.run()
+    except OSError:
+        pass  # the listening socket was closed by shutdown()
+
+
+def run_gunicorn():
+    from gunicorn.app.base import Application
+
+    class GardenTradeApplication(Application):
+        def init(self, parser, opts, args):
+            pass
+
+        def load_config(self):
+            self.load_config_from_file(CONFIG_PATH)
+
+        def load(self):
+            # Imported in each worker after the fork, never in the master
+            from app import app
+            return app
+
+    GardenTradeApplication().run()
+
+
+SERVERS = {
+    'gunicorn': run_gunicorn,
+    'waitress': run_waitress,
+    'dev': run_dev,
+}
+
+
+def main():
+    mode = os.environ.get('SERVER', 'gunicorn')
+    if mode not in SERVERS:
+        sys.exit('unknown SERVER %r (expected one of: %s)' % (mode, ', '.join(SERVERS)))
+    SERVERS[mode]()
+
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    main()
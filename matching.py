@@ -0,0 +1,173 @@
+"""
+Garden Trade Hub - Trade matchmaking
+Pairs trades whose offerings cover what another trade is seeking, kept
+up to date incrementally as listings are added
+"""
+
+import math
+import sys
+import threading
+from bisect import bisect_left, insort
+from heapq import nlargest
+
+from search import tokenize
+
+# Words that say nothing about the item being traded
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'any', 'anything', 'for', 'in', 'kind', 'kinds', 'looking', 'my', 'of',
+    'or', 'other', 'some', 'the', 'to', 'trade', 'with', 'your',
+))
+
+# Matches kept per trade, and so the most /api/trades/<id>/matches returns
+TOP_K = 20
+
+# Newest postings scanned per term; older listings of very common terms
+# ("seeds") are not worth an exhaustive pass
+MAX_POSTINGS_SCANNED = 500
+
+
+def stem(token):
+    """Fold simple English plurals so "tomatoes" meets "tomato" """
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith('oes'):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def match_terms(text):
+    """Normalized, de-duplicated item terms of an offering or seeking field"""
+    terms = dict.fromkeys(stem(token) for token in tokenize(text) if token not in STOP_WORDS)
+    return tuple(sys.intern(term) for term in terms)
+
+
+class MatchIndex:
+    """Complementary-trade index over ``offering`` and ``seeking``.
+
+    Two posting maps run in opposite directions: ``offers`` from a term to
+    the trades offering it and ``seeks`` from a term to the trades seeking
+    it.  A trade's candidates are the offers of its seek terms plus the
+    seeks of its offer terms, so only trades sharing a term are ever
+    scored, never all pairs.  The score sums the idf of every shared term
+    in both directions, so a two-way swap outranks a one-way one, and
+    trades from the same contact email are never paired.
+
+    ``add()`` scores the new trade against its candidates once, keeps its
+    top ``TOP_K`` and offers it to every candidate already holding a list,
+    which is all the incremental work an insert needs.  Lists for trades
+    loaded in bulk are filled lazily on first request.  Postings are kept
+    in id order and scanned newest first.
+    """
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self._offers = {}
+        self._seeks = {}
+        self._terms = {}
+        self._owners = {}
+        self._matches = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def add(self, trade, compute=True):
+        """Index one trade; with ``compute`` also update the affected match lists"""
+        offer_terms = match_terms(trade.get('offering', ''))
+        seek_terms = match_terms(trade.get('seeking', ''))
+        trade_id = trade['id']
+        with self._lock:
+            self._terms[trade_id] = (offer_terms, seek_terms)
+            self._owners[trade_id] = trade.get('contact_email', '').strip().lower()
+            for term in offer_terms:
+                self._offers.setdefault(term, []).append(trade_id)
+            for term in seek_terms:
+                self._seeks.setdefault(term, []).append(trade_id)
+            if not compute:
+                return
+            scores = self._candidates(trade_id)
+            self._matches[trade_id] = self._top(scores)
+            for other, score in scores.items():
+                matches = self._matches.get(other)
+                if matches is None:
+                    continue
+                if len(matches) < self.top_k:
+                    insort(matches, (score, trade_id))
+                elif (score, trade_id) > matches[0]:
+                    del matches[0]
+                    insort(matches, (score, trade_id))
+
+    def add_many(self, trades):
+        """Index a batch (in any order) without scoring it.
+
+        Scoring each row would cost a bulk import one candidate pass per
+        trade, so cached match lists are dropped instead and rebuilt on
+        their next request.
+        """
+        for trade in trades:
+            self.add(trade, compute=False)
+        with self._lock:
+            for postings in (self._offers, self._seeks):
+                for ids in postings.values():
+                    ids.sort()
+            self._matches.clear()
+
+    def remove(self, trade_ids):
+        """Drop deleted trades from the postings.  Cached match lists may
+        name them, so all are dropped to be rebuilt on their next request."""
+        with self._lock:
+            for trade_id in trade_ids:
+                terms = self._terms.pop(trade_id, None)
+                if terms is None:
+                    continue
+                del self._owners[trade_id]
+                for term_list, postings in zip(terms, (self._offers, self._seeks)):
+                    for term in term_list:
+                        ids = postings[term]
+                        position = bisect_left(ids, trade_id)
+                        if position < len(ids) and ids[position] == trade_id:
+                            del ids[position]
+            self._matches.clear()
+
+    def _candidates(self, trade_id):
+        """``{other_id: score}`` for every trade sharing a term with ``trade_id``"""
+        offer_terms, seek_terms = self._terms[trade_id]
+        owner = self._owners[trade_id]
+        total = len(self._terms)
+        scores = {}
+        for terms, postings in ((seek_terms, self._offers), (offer_terms, self._seeks)):
+            for term in terms:
+                ids = postings.get(term)
+                if not ids:
+                    continue
+                idf = math.log(1.0 + total / len(ids))
+                for position in range(len(ids) - 1, max(-1, len(ids) - 1 - MAX_POSTINGS_SCANNED), -1):
+                    other = ids[position]
+                    if other != trade_id and (not owner or self._owners[other] != owner):
+                        scores[other] = scores.get(other, 0.0) + idf
+        return scores
+
+    def _top(self, scores):
+        """The best ``top_k`` of ``scores`` as ``(score, id)``, worst first"""
+        return sorted(nlargest(self.top_k, ((score, other) for other, score in scores.items())))
+
+    def matches(self, trade_id, limit=None):
+        """``(other_id, score)`` pairs, best first, for an indexed trade (KeyError if not)"""
+        with self._lock:
+            if trade_id not in self._terms:
+                raise KeyError(trade_id)
+            matches = self._matches.get(trade_id)
+            if matches is None:
+                matches = self._matches[trade_id] = self._top(self._candidates(trade_id))
+            best = matches[::-1][:limit]
+        return [(other, score) for score, other in best]
+
+    def shared_terms(self, trade_id, other_id):
+        """``(they_offer, they_seek)``: terms ``other_id`` offers that ``trade_id``
+        seeks, and terms it seeks that ``trade_id`` offers"""
+        offer_terms, seek_terms = self._terms[trade_id]
+        other_offers, other_seeks = self._terms[other_id]
+        return ([term for term in seek_terms if term in other_offers],
+                [term for term in offer_terms if term in other_seeks])
@@ -0,0 +1,281 @@
+"""
+Garden Trade Hub - Request metrics and profiling
+Per-route histograms exposed at /metrics in Prometheus text format, plus an
+opt-in profiler that dumps stacks for slow requests
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import (before_render_template, current_app, g, has_request_context, request,
+                   template_rendered)
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PREFIX = 'garden_trade_'
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help_text), '# TYPE %s histogram' % self.name]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (counts, count, total) in series:
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append('%s_bucket{%s} %d' % (self.name, _join(base, 'le="%s"' % bound), cumulative))
+            lines.append('%s_bucket{%s} %d' % (self.name, _join(base, 'le="+Inf"'), count))
+            lines.append('%s_count{%s} %d' % (self.name, base, count))
+            lines.append('%s_sum{%s} %.6f' % (self.name, base, total))
+        return lines
+
+
+def _labels(names, values):
+    return ','.join('%s="%s"' % (name, _escape(value)) for name, value in zip(names, values))
+
+
+def _join(*parts):
+    return ','.join(part for part in parts if part)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Flask extension recording request, template and JSON timings.
+
+    ``init_app()`` installs request hooks, template signal receivers, a timed
+    wrapper around ``app.json.response`` (what ``jsonify`` calls) and the
+    ``/metrics`` route.  Other counters (cache hit rates and the like) are
+    exported through ``register_gauge()`` callbacks evaluated at scrape
+    time.
+    """
+
+    def __init__(self, app=None):
+        self.requests = Counter()
+        self.request_seconds = Histogram(
+            PREFIX + 'request_duration_seconds', 'Request latency by route.',
+            ('route', 'method'), LATENCY_BUCKETS)
+        self.template_seconds = Histogram(
+            PREFIX + 'template_render_seconds', 'Template render time by route and template.',
+            ('route', 'template'), LATENCY_BUCKETS)
+        self.json_seconds = Histogram(
+            PREFIX + 'json_serialize_seconds', 'JSON serialization time by route.',
+            ('route',), LATENCY_BUCKETS)
+        self.response_bytes = Histogram(
+            PREFIX + 'response_size_bytes', 'Response body size by route.',
+            ('route',), SIZE_BUCKETS)
+        self._gauges = []
+        self._lock = threading.Lock()
+        self.profiler = SlowRequestProfiler.from_environ()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+
+        make_json_response = app.json.response
+
+        def timed_json_response(*args, **kwargs):
+            with self.time(self.json_seconds):
+                return make_json_response(*args, **kwargs)
+
+        app.json.response = timed_json_response
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    def register_gauge(self, name, help_text, collect):
+        """Export a gauge; ``collect()`` returns ``{((label, value), ...): number}``"""
+        self._gauges.append((PREFIX + name, help_text, collect))
+
+    @contextmanager
+    def time(self, histogram, *labels):
+        """Observe the duration of a block, labelled with the current route"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe((_route(),) + labels, time.perf_counter() - started)
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        self.profiler.start()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = _route()
+        self.request_seconds.observe((route, request.method), elapsed)
+        with self._lock:
+            self.requests[(route, request.method, response.status_code)] += 1
+        if not response.is_streamed:
+            self.response_bytes.observe((route,), response.calculate_content_length() or 0)
+        self.profiler.finish(elapsed)
+        return response
+
+    def _start_render(self, sender, template, context, **extra):
+        g.metrics_render_started = time.perf_counter()
+
+    def _finish_render(self, sender, template, context, **extra):
+        started = g.pop('metrics_render_started', None)
+        if started is not None:
+            self.template_seconds.observe((_route(), template.name or 'string'),
+                                          time.perf_counter() - started)
+
+    def render(self):
+        lines = ['# HELP %srequests_total Requests by route, method and status.' % PREFIX,
+                 '# TYPE %srequests_total counter' % PREFIX]
+        with self._lock:
+            counts = sorted(self.requests.items())
+        for (route, method, status), count in counts:
+            lines.append('%srequests_total{%s} %d' % (
+                PREFIX, _labels(('route', 'method', 'status'), (route, method, status)), count))
+        for histogram in (self.request_seconds, self.template_seconds,
+                          self.json_seconds, self.response_bytes):
+            lines.extend(histogram.render())
+        for name, help_text, collect in self._gauges:
+            lines.extend(['# HELP %s %s' % (name, help_text), '# TYPE %s gauge' % name])
+            for labels, value in sorted(collect().items()):
+                lines.append('%s{%s} %s' % (name, _labels(*zip(*labels)) if labels else '', value))
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        return current_app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _route():
+    if not has_request_context():
+        return 'none'
+    return request.endpoint or 'unmatched'
+
+
+class SlowRequestProfiler:
+    """Opt-in per-request profiler that keeps output only for slow requests.
+
+    Enabled for every request with ``PROFILE_REQUESTS=1``, or per request
+    with an ``X-Profile`` header matching ``PROFILE_TOKEN``.  ``PROFILE_MODE``
+    picks ``sample`` (folded stacks for flame graphs, sampled every
+    ``PROFILE_INTERVAL_MS``) or ``cprofile`` (pstats files).  Requests slower
+    than ``PROFILE_SLOW_MS`` are written to ``PROFILE_DIR``.
+    """
+
+    def __init__(self, always=False, token=None, mode='sample', slow_ms=100.0,
+                 interval_ms=5.0, directory='profiles'):
+        self.always = always
+        self.token = token
+        self.mode = mode
+        self.slow_seconds = slow_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.directory = directory
+
+    @classmethod
+    def from_environ(cls):
+        return cls(
+            always=os.environ.get('PROFILE_REQUESTS', '0').lower() in ('1', 'true', 'yes'),
+            token=os.environ.get('PROFILE_TOKEN') or None,
+            mode=os.environ.get('PROFILE_MODE', 'sample'),
+            slow_ms=float(os.environ.get('PROFILE_SLOW_MS', 100)),
+            interval_ms=float(os.environ.get('PROFILE_INTERVAL_MS', 5)),
+            directory=os.environ.get('PROFILE_DIR', 'profiles'),
+        )
+
+    def wanted(self):
+        if self.always:
+            return True
+        return self.token is not None and request.headers.get('X-Profile') == self.token
+
+    def start(self):
+        if not self.wanted():
+            return
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            profile.enable()
+            g.profile = profile
+        else:
+            g.profile = StackSampler(threading.get_ident(), self.interval)
+            g.profile.start()
+
+    def finish(self, elapsed):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        if isinstance(profile, cProfile.Profile):
+            profile.disable()
+        else:
+            profile.stop()
+        if elapsed < self.slow_seconds:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, '%s-%d-%s' % (
+            time.strftime('%Y%m%d-%H%M%S'), int(elapsed * 1000), _route()))
+        if isinstance(profile, cProfile.Profile):
+            profile.dump_stats(stem + '.prof')
+        else:
+            with open(stem + '.folded', 'w') as handle:
+                for stack, count in sorted(profile.stacks.items()):
+                    handle.write('%s %d\n' % (stack, count))
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack into folded ``a;b;c count`` form"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append('%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename),
+                                             code.co_firstlineno))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
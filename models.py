@@ -0,0 +1,69 @@
+"""
+Garden Trade Hub - Data model
+Compact slotted record for trade listings
+"""
+
+import sys
+from dataclasses import MISSING, dataclass, fields
+from operator import attrgetter
+
+
+@dataclass(slots=True)
+class Trade:
+    """One trade listing.
+
+    Slots keep a record to a fixed-size object instead of a 12-key dict.
+    ``category`` and ``created_at`` take a handful of distinct values across
+    every listing, so they are interned and shared.  ``duplicate_of`` is the
+    id of the earlier listing this one reposts, when it was flagged as one.
+    Item access (``trade['title']``, ``trade.get()``) is kept so code
+    written against the old dict records, and Jinja templates, work
+    unchanged.
+    """
+
+    id: int
+    title: str
+    category: str
+    offering: str
+    seeking: str
+    description: str
+    location: str
+    contact_name: str
+    contact_email: str
+    contact_phone: str
+    created_at: str
+    duplicate_of: int | None = None
+
+    def __post_init__(self):
+        self.category = sys.intern(self.category)
+        self.created_at = sys.intern(self.created_at)
+
+    @classmethod
+    def from_dict(cls, data, **overrides):
+        """Build a Trade from a mapping (or another Trade); missing text is ''"""
+        values = {name: data.get(name, default) for name, default in FIELD_DEFAULTS.items()}
+        values.update(overrides)
+        return cls(**values)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        return dict(zip(TRADE_FIELDS, _values(self)))
+
+
+# Field names in declaration (and table column) order
+TRADE_FIELDS = tuple(field.name for field in fields(Trade))
+
+# What a field is when a mapping lacks it: '' for text, else its default
+FIELD_DEFAULTS = {field.name: '' if field.default is MISSING else field.default
+                  for field in fields(Trade)}
+
+_values = attrgetter(*TRADE_FIELDS)
+
@@ -43,12 +43,144 @@ let trades = [
     }
 ];
 
+// Fields the card grid needs; contact details are fetched by showContact()
+const LIST_FIELDS = 'id,title,category,offering,seeking,description,location,created_at';
+const PAGE_SIZE = 50;
+
 // Initialize the application
 function initializeApp() {
     setupSearchAndFilter();
     setupFormHandling();
     renderTrades();
     setupSmoothScrolling();
+    setupLoadMore();
+    loadTrades().catch(() => {});
+    subscribeToTrades();
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) syncTrades().catch(() => {});
+    });
+}
+
+// Dataset version the loaded listings reflect; syncTrades() asks for what changed since
+let syncVersion = null;
+// Cursor for the next page of the list being browsed, null once it is exhausted
+let nextAfterId = null;
+let listCategory = 'all';
+let loadingMore = false;
+
+// Load a page of listings from the server, keeping the sample data offline.
+// Without afterId it replaces the list; with it the page is appended.
+function loadTrades(afterId, category = 'all') {
+    let url = `/api/trades?fields=${LIST_FIELDS}&limit=${PAGE_SIZE}`;
+    if (afterId) url += `&after_id=${afterId}`;
+    if (category !== 'all') url += `&category=${encodeURIComponent(category)}`;
+
+    return fetch(url)
+        .then(response => response.ok ? response.json() : Promise.reject(response))
+        .then(page => {
+            if (afterId) {
+                const loaded = new Set(trades.map(t => t.id));
+                trades = trades.concat(page.trades.filter(t => !loaded.has(t.id)));
+            } else {
+                trades = page.trades;
+                syncVersion = page.version;
+            }
+            nextAfterId = page.next_after_id;
+            listCategory = category;
+            refreshVisibleTrades();
+            updateCategoryCounts(page.facets.category);
+            return page.next_after_id;
+        });
+}
+
+// Append the next page of the list being browsed
+function loadMoreTrades() {
+    if (!nextAfterId || loadingMore) return;
+    loadingMore = true;
+    loadTrades(nextAfterId, listCategory)
+        .catch(() => {})
+        .finally(() => { loadingMore = false; });
+}
+
+// Show "Load more" while the browsed list has further pages; with
+// IntersectionObserver it also loads them as it scrolls into view
+function setupLoadMore() {
+    const loadMore = document.getElementById('loadMore');
+    if (!loadMore || !window.IntersectionObserver) return;
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMoreTrades();
+    }, { rootMargin: '400px' }).observe(loadMore);
+}
+
+function updateLoadMore(showingList) {
+    const loadMore = document.getElementById('loadMore');
+    if (loadMore) loadMore.style.display = showingList && nextAfterId ? '' : 'none';
+}
+
+// Receive new listings as the server commits them instead of re-fetching
+function subscribeToTrades() {
+    if (!window.EventSource) return;
+
+    const source = new EventSource('/api/trades/stream');
+    source.addEventListener('trade', event => {
+        const trade = JSON.parse(event.data);
+        if (trades.some(t => t.id === trade.id)) return;
+        trades.unshift(trade);
+        refreshVisibleTrades();
+    });
+    // Too far behind to catch up event by event: fetch the changes instead
+    source.addEventListener('reset', () => syncTrades().catch(() => {}));
+}
+
+// Apply the inserts and deletes made since syncVersion, without refetching
+// the list; the first page is reloaded only if the server's log is too short
+function syncTrades() {
+    const categoryFilter = document.getElementById('categoryFilter');
+    const category = categoryFilter ? categoryFilter.value : 'all';
+    if (syncVersion === null) return loadTrades(null, category);
+
+    return fetch(`/api/trades?since=${syncVersion}&fields=${LIST_FIELDS}`)
+        .then(response => {
+            if (response.status === 410) return loadTrades(null, category).then(() => null);
+            return response.ok ? response.json() : Promise.reject(response);
+        })
+        .then(delta => {
+            if (!delta) return;
+            const replaced = new Set(delta.deleted.concat(delta.inserted.map(t => t.id)));
+            trades = delta.inserted.reverse().concat(trades.filter(t => !replaced.has(t.id)));
+            syncVersion = delta.version;
+            refreshVisibleTrades();
+            if (delta.more) return syncTrades();
+        });
+}
+
+// Re-render under the current category unless search results are showing
+function refreshVisibleTrades() {
+    const searchInput = document.getElementById('searchInput');
+    const categoryFilter = document.getElementById('categoryFilter');
+    if (!searchInput || !searchInput.value.trim()) {
+        filterLocalTrades('', categoryFilter ? categoryFilter.value : 'all');
+        updateLoadMore(true);
+    }
+}
+
+// Show per-category totals from the server's facet counts in the filter
+function updateCategoryCounts(counts) {
+    const categoryFilter = document.getElementById('categoryFilter');
+    if (!categoryFilter || !counts) return;
+    
+    Array.from(categoryFilter.options).forEach(option => {
+        if (option.value in counts) {
+            option.textContent = `${option.value} (${counts[option.value]})`;
+        }
+    });
+}
+
+// Fetch the full record for a trade, including contact details
+function fetchTrade(tradeId) {
+    return fetch(`/api/trades/${tradeId}`)
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
 }
 
 // Setup search and filter functionality
@@ -67,9 +199,44 @@ function setupSearchAndFilter() {
 
 // Filter trades based on search and category
 function filterTrades() {
-    const searchTerm = document.getElementById('searchInput').value.toLowerCase();
+    const searchTerm = document.getElementById('searchInput').value.trim();
     const selectedCategory = document.getElementById('categoryFilter').value;
     
+    if (searchTerm) {
+        updateLoadMore(false);
+        searchTrades(searchTerm, selectedCategory)
+            .then(results => renderTrades(results))
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    filterLocalTrades(searchTerm.toLowerCase(), selectedCategory);
+                }
+            });
+        return;
+    }
+    
+    loadTrades(null, selectedCategory)
+        .catch(() => filterLocalTrades('', selectedCategory));
+}
+
+// Ranked, prefix-matching search served by /api/search
+let searchController = null;
+function searchTrades(query, category) {
+    if (searchController) searchController.abort();
+    searchController = new AbortController();
+    
+    const params = new URLSearchParams({ q: query, category: category, fields: LIST_FIELDS });
+    return fetch(`/api/search?${params}`, { signal: searchController.signal })
+        .then(response => response.ok ? response.json() : Promise.reject(response))
+        .then(body => {
+            body.trades.forEach(result => {
+                if (!trades.some(t => t.id === result.id)) trades.push(result);
+            });
+            return body.trades;
+        });
+}
+
+// Fallback scan over the listings already loaded in the browser
+function filterLocalTrades(searchTerm, selectedCategory) {
     const filteredTrades = trades.filter(trade => {
         const matchesSearch = !searchTerm || 
             trade.title.toLowerCase().includes(searchTerm) ||
@@ -166,7 +333,7 @@ function truncateText(text, length) {
 function clearFilters() {
     document.getElementById('searchInput').value = '';
     document.getElementById('categoryFilter').value = 'all';
-    renderTrades();
+    filterTrades();
 }
 
 // Show contact modal
@@ -174,6 +341,15 @@ function showContact(tradeId) {
     const trade = trades.find(t => t.id === tradeId);
     if (!trade) return;
     
+    if (trade.contact_email === undefined) {
+        fetchTrade(tradeId).then(full => {
+            if (!full) return;
+            Object.assign(trade, full);
+            showContact(tradeId);
+        });
+        return;
+    }
+    
     const modalBody = document.getElementById('contactModalBody');
     
     modalBody.innerHTML = `
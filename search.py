@@ -0,0 +1,175 @@
+"""
+Garden Trade Hub - Trade search index
+Inverted token index over trade text with prefix matching and ranking
+"""
+
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from heapq import nlargest
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Relative weight of a token hit in each searchable field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'offering': 2.0,
+    'seeking': 2.0,
+    'description': 1.0,
+}
+
+# Score multiplier for a token reached through prefix expansion
+PREFIX_PENALTY = 0.8
+
+# Upper bound on vocabulary tokens a single prefix expands to
+MAX_EXPANSIONS = 64
+
+# Matches gathered per requested result before ranking stops early
+CANDIDATE_FACTOR = 4
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of ``text``"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted index mapping tokens to the trades that contain them.
+
+    Each token keeps a ``{trade_id: score}`` map for membership tests and the
+    same postings bucketed by score, newest trade last in every bucket, so
+    the best hits of a term can be read off the top without sorting.  The
+    vocabulary is kept sorted so a query term expands to every token it
+    prefixes with a bisect instead of a scan.
+
+    Queries AND their terms together: candidates are drawn from the rarest
+    term in impact order and checked against the others, stopping once
+    ``CANDIDATE_FACTOR * limit`` matches are in hand, then ranked by summed
+    ``score * idf`` with the newest trade first on ties.  Each trade's
+    category is kept alongside, so a category filter never has to load
+    the trade itself.
+    """
+
+    def __init__(self, field_weights=None):
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self._postings = {}
+        self._impacts = {}
+        self._vocab = []
+        self._categories = {}
+        self._removed = set()
+        self._doc_count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._doc_count
+
+    def add(self, trade):
+        """Index one trade"""
+        scores = {}
+        for field, weight in self.field_weights.items():
+            for token in tokenize(trade.get(field, '')):
+                scores[token] = scores.get(token, 0.0) + weight
+
+        trade_id = trade['id']
+        with self._lock:
+            for token, score in scores.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._impacts[token] = {}
+                    insort(self._vocab, token)
+                postings[trade_id] = score
+                self._impacts[token].setdefault(score, []).append(trade_id)
+            self._categories[trade_id] = trade.get('category', '')
+            self._doc_count += 1
+
+    def add_many(self, trades):
+        for trade in trades:
+            self.add(trade)
+
+    def remove(self, trade_ids):
+        """Drop deleted trades.  Their postings stay behind as tombstones
+        that search() skips; ids are never reused, so that is safe."""
+        with self._lock:
+            for trade_id in trade_ids:
+                if self._categories.pop(trade_id, None) is not None:
+                    self._removed.add(trade_id)
+                    self._doc_count -= 1
+
+    def expand(self, prefix):
+        """Vocabulary tokens starting with ``prefix``, exact match first"""
+        vocab = self._vocab
+        start = bisect_left(vocab, prefix)
+        tokens = []
+        for position in range(start, min(start + MAX_EXPANSIONS, len(vocab))):
+            if not vocab[position].startswith(prefix):
+                break
+            tokens.append(vocab[position])
+        return tokens
+
+    def _weights(self, term, tokens):
+        """``(token, idf)`` pairs for the tokens a query term matched"""
+        weights = []
+        for token in tokens:
+            idf = math.log(1.0 + self._doc_count / len(self._postings[token]))
+            weights.append((token, idf if token == term else idf * PREFIX_PENALTY))
+        return weights
+
+    def _impact_order(self, weights):
+        """Trade ids of a term's postings, highest impact and newest first"""
+        for token, _idf in weights:
+            buckets = self._impacts[token]
+            for score in sorted(buckets, reverse=True):
+                yield from reversed(buckets[score])
+
+    def _score(self, trade_id, weights):
+        best = None
+        for token, idf in weights:
+            score = self._postings[token].get(trade_id)
+            if score is not None and (best is None or score * idf > best):
+                best = score * idf
+        return best
+
+    def search(self, query, limit=20, prefix=True, category=None, accept=None):
+        """Return ``(trade_id, score)`` pairs for ``query``, best first.
+
+        With ``prefix`` every term also matches tokens it prefixes, which is
+        what type-ahead wants.  ``category`` keeps only trades listed under
+        it, and ``accept`` is an optional ``trade_id -> bool`` filter; both
+        apply before ranking.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        wanted = limit * CANDIDATE_FACTOR
+        results = {}
+        with self._lock:
+            per_term = []
+            for term in terms:
+                tokens = self.expand(term) if prefix else [t for t in (term,) if t in self._postings]
+                if not tokens:
+                    return []
+                per_term.append(self._weights(term, tokens))
+            per_term.sort(key=lambda weights: sum(len(self._postings[t]) for t, _ in weights))
+
+            driver, others = per_term[0], per_term[1:]
+            for trade_id in self._impact_order(driver):
+                if trade_id in results or trade_id in self._removed:
+                    continue
+                total = self._score(trade_id, driver)
+                for weights in others:
+                    extra = self._score(trade_id, weights)
+                    if extra is None:
+                        break
+                    total += extra
+                else:
+                    if category is not None and self._categories.get(trade_id) != category:
+                        continue
+                    if accept is None or accept(trade_id):
+                        results[trade_id] = total
+                        if len(results) >= wanted:
+                            break
+
+        return nlargest(limit, results.items(), key=lambda item: (item[1], item[0]))
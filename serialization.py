@@ -0,0 +1,84 @@
+"""
+Garden Trade Hub - JSON serialization
+Flask JSON providers for trade records, with an optional orjson fast path
+"""
+
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+from models import Trade
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is always available
+    orjson = None
+
+
+class TradeJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes Trade records with a flat dict build.
+
+    The default provider would fall back to ``dataclasses.asdict()``, which
+    deep-copies every field.  ``dump_bytes()`` is the compact UTF-8 form the
+    streaming and cached API bodies are assembled from.
+    """
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, Trade):
+            return obj.to_dict()
+        return DefaultJSONProvider.default(obj)
+
+    def dump_bytes(self, obj):
+        """Compact JSON for ``obj`` as UTF-8 bytes"""
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonTradeJSONProvider(TradeJSONProvider):
+    """JSON provider backed by orjson, several times faster than the stdlib.
+
+    orjson serializes the slotted Trade dataclass natively, in field order;
+    dicts are still sorted.  Output is UTF-8 rather than ASCII-escaped and
+    always compact except for ``response()`` in debug mode.  Types orjson
+    does not know (and dates, to keep Flask's HTTP-date format) go through
+    the same ``default()`` as the stdlib provider.
+    """
+
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return self.dump_bytes(obj, indent=kwargs.get('indent')).decode('utf-8')
+
+    def dump_bytes(self, obj, indent=None):
+        option = self.option | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dump_bytes(obj, indent=indent) + b'\n',
+                                        mimetype=self.mimetype)
+
+
+# Providers selectable through the JSON_ENCODER environment variable
+JSON_PROVIDERS = {
+    'stdlib': TradeJSONProvider,
+    'orjson': OrjsonTradeJSONProvider,
+}
+
+
+def json_provider_class(name=None):
+    """The configured provider class; ``auto`` (the default) prefers orjson"""
+    name = name or os.environ.get('JSON_ENCODER', 'auto')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    try:
+        provider = JSON_PROVIDERS[name]
+    except KeyError:
+        raise ValueError('unknown JSON_ENCODER: %r' % name) from None
+    if provider is OrjsonTradeJSONProvider and orjson is None:
+        raise ValueError('JSON_ENCODER=orjson but orjson is not installed')
+    return provider
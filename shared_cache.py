@@ -0,0 +1,263 @@
+"""
+Garden Trade Hub - Shared response cache
+Version-stamped response bodies held per process and in a tier every
+worker process reads, rebuilt by one worker at a time
+"""
+
+import fcntl
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from fragment_cache import SnapshotCache
+
+try:
+    import redis
+except ImportError:  # redis is optional; the file tier needs nothing extra
+    redis = None
+
+KEY_RE = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _stamp(version):
+    return str(version).encode('utf-8')
+
+
+class FileTier:
+    """Bodies in one file per key under ``directory``, read through mmap.
+
+    A file is the version stamp, a newline, then the body.  Writers fill a
+    temporary file and rename it over the old one, so a reader always maps
+    a complete body, and checking the stamp of a stale file touches one
+    page rather than the whole body.  Rebuild locks are ``flock()``s on a
+    per-key lock file, which the kernel drops if a worker dies mid-build.
+    """
+
+    poll_interval = 0.01
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def _path(self, key, suffix):
+        if not KEY_RE.match(key):
+            raise ValueError('cache keys must be plain names: %r' % key)
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key, version):
+        stamp = _stamp(version)
+        try:
+            with open(self._path(key, '.body'), 'rb') as handle, \
+                    mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(stamp) + 1] != stamp + b'\n':
+                    return None
+                return mapped[len(stamp) + 1:]
+        except (FileNotFoundError, ValueError):  # ValueError: an empty file cannot be mapped
+            return None
+
+    def put(self, key, version, body):
+        path = self._path(key, '.body')
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix='.' + key)
+        try:
+            with os.fdopen(descriptor, 'wb') as handle:
+                handle.write(_stamp(version) + b'\n')
+                handle.write(body)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def acquire(self, key, timeout):
+        """Take the key's rebuild lock; a release function, or None on timeout"""
+        descriptor = os.open(self._path(key, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lambda: os.close(descriptor)  # closing releases the lock
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(descriptor)
+                    return None
+                time.sleep(self.poll_interval)
+
+
+class RedisTier:
+    """Bodies in Redis under ``<prefix><key>:<version>``, expiring after ``ttl``.
+
+    Stamping the version into the key means a stale body is never read
+    back; old versions simply age out.  Rebuild locks are ``SET NX`` keys
+    with a token, released only by their holder and expiring on their own
+    if it dies.
+    """
+
+    RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+    poll_interval = 0.01
+
+    def __init__(self, url, prefix='garden_trade:cache:', ttl=3600):
+        if redis is None:
+            raise ValueError('SHARED_CACHE=redis but the redis package is not installed')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self._release = self.client.register_script(self.RELEASE)
+
+    def get(self, key, version):
+        return self.client.get(self.prefix + key + ':' + str(version))
+
+    def put(self, key, version, body):
+        self.client.set(self.prefix + key + ':' + str(version), body, ex=self.ttl)
+
+    def acquire(self, key, timeout):
+        lock_key = self.prefix + key + ':lock'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while not self.client.set(lock_key, token, nx=True, px=max(1, int(timeout * 1000))):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+        return lambda: self._release(keys=[lock_key], args=[token])
+
+
+# Shared tiers selectable through the SHARED_CACHE environment variable;
+# each factory takes the directory the file tier should use
+SHARED_TIERS = {
+    'none': lambda directory: None,
+    'file': FileTier,
+    'redis': lambda directory: RedisTier(os.environ.get('REDIS_URL', 'redis://localhost:6379/0')),
+}
+
+
+def create_shared_tier(directory, default='none'):
+    """The configured shared tier; SHARED_CACHE=auto (or unset) means ``default``"""
+    name = os.environ.get('SHARED_CACHE', 'auto')
+    if name == 'auto':
+        name = default
+    try:
+        factory = SHARED_TIERS[name]
+    except KeyError:
+        raise ValueError('unknown SHARED_CACHE: %r' % name) from None
+    return factory(os.environ.get('SHARED_CACHE_DIR', directory))
+
+
+class ResponseCache:
+    """Whole response bodies keyed by name and stamped with a version.
+
+    Lookups try the process-local tier (one SnapshotCache per key), then
+    the shared tier, whose hits are copied locally.  Versions come from the
+    dataset version every worker reads from the same database, so one write
+    turns every cached copy, in every process, into a miss at once.
+
+    ``acquire()`` makes rebuilds single-flight: the first request to miss
+    takes the key's lock (a thread lock, plus the shared tier's lock across
+    processes) and builds the body; the rest wait for it and then find the
+    body in the cache instead of building it again.
+    """
+
+    def __init__(self, max_bytes, shared=None, lock_timeout=10.0):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.lock_timeout = lock_timeout
+        self.shared_hits = Counter()
+        self.builds = Counter()
+        self._sizes = {}
+        self._local = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _snapshot(self, key):
+        snapshot = self._local.get(key)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._local.setdefault(key, SnapshotCache(self.max_bytes))
+        return snapshot
+
+    def get(self, key, version):
+        """Cached body for ``key`` at ``version``, or None"""
+        snapshot = self._snapshot(key)
+        body = snapshot.get(version)
+        if body is None and self.shared is not None:
+            body = self.shared.get(key, version)
+            if body is not None:
+                snapshot.put(version, body)
+                self.shared_hits[key] += 1
+        return body
+
+    def put(self, key, version, body):
+        if len(body) > self.max_bytes:
+            return
+        self._snapshot(key).put(version, body)
+        if self.shared is not None:
+            self.shared.put(key, version, body)
+
+    def acquire(self, key):
+        """Take the rebuild lock for ``key``; returns an idempotent release
+        function, or None if the current holder did not finish within
+        ``lock_timeout`` (the caller then builds without it)"""
+        with self._lock:
+            local = self._locks.setdefault(key, threading.Lock())
+        started = time.monotonic()
+        if not local.acquire(timeout=self.lock_timeout):
+            return None
+        release_shared = None
+        if self.shared is not None:
+            remaining = max(0.0, self.lock_timeout - (time.monotonic() - started))
+            release_shared = self.shared.acquire(key, remaining)
+            if release_shared is None:
+                local.release()
+                return None
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                if release_shared is not None:
+                    release_shared()
+                local.release()
+        return release
+
+    def fits(self, key):
+        """Whether the last body built for ``key`` was small enough to cache
+        (True until one has been built)"""
+        return self._sizes.get(key, 0) <= self.max_bytes
+
+    def filling(self, key, version, chunks):
+        """Pass ``chunks`` through, caching the joined body at the end"""
+        kept, size = [], 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= self.max_bytes:
+                    kept.append(chunk)
+                else:
+                    kept = None
+            yield chunk
+        self._sizes[key] = size
+        self.builds[key] += 1
+        if kept is not None:
+            self.put(key, version, b''.join(kept))
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def counters(self):
+        """``{(key, result): count}`` with results hit, shared_hit and build"""
+        counters = {}
+        for key, snapshot in list(self._local.items()):
+            counters[(key, 'hit')] = snapshot.hits
+        for key, count in self.shared_hits.items():
+            counters[(key, 'shared_hit')] = count
+        for key, count in self.builds.items():
+            counters[(key, 'build')] = count
+        return counters
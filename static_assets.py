@@ -0,0 +1,122 @@
+"""
+Garden Trade Hub - Static asset pipeline
+Serves stylesheets and scripts under content-hashed URLs, precompressed
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import abort, current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Hashed URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Encodings we precompress to, in order of preference
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class Asset:
+    """One static file with its content hash and precompressed variants"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as handle:
+            data = handle.read()
+
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.hashed_name = '%s.%s%s' % (stem, self.digest, ext)
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+        self.variants = {'identity': data}
+        compressed = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(data):
+                self.variants[encoding] = body
+
+
+class AssetPipeline:
+    """Registry of static assets served at ``<url_prefix>/<name>.<hash>.<ext>``.
+
+    Files are read, hashed and compressed once at registration.  Templates
+    link them through the ``asset_url()`` global.  With ``auto_reload`` (by
+    default whenever Jinja auto-reloads, i.e. debug mode) a changed file is
+    picked up and rehashed on the next ``url()`` call.
+    """
+
+    def __init__(self, root, url_prefix='/assets', auto_reload=None):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.auto_reload = auto_reload
+        self.app = None
+        self._assets = {}
+        self._by_hashed_name = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.add_url_rule(self.url_prefix + '/<path:filename>', 'asset', self.serve)
+        app.add_template_global(self.url, 'asset_url')
+
+    def register(self, *names):
+        for name in names:
+            self._load(name)
+
+    def _load(self, name):
+        asset = Asset(name, os.path.join(self.root, name))
+        with self._lock:
+            previous = self._assets.get(name)
+            if previous is not None:
+                self._by_hashed_name.pop(previous.hashed_name, None)
+            self._assets[name] = asset
+            self._by_hashed_name[asset.hashed_name] = asset
+        return asset
+
+    def get(self, name):
+        asset = self._assets[name]
+        if self._reloading() and os.path.getmtime(asset.path) != asset.mtime:
+            asset = self._load(name)
+        return asset
+
+    def _reloading(self):
+        if self.auto_reload is None:
+            return self.app is not None and self.app.jinja_env.auto_reload
+        return self.auto_reload
+
+    def url(self, name):
+        """Content-hashed URL for a registered asset"""
+        return '%s/%s' % (self.url_prefix, self.get(name).hashed_name)
+
+    @property
+    def version(self):
+        """Digest over every asset hash; changes whenever any asset does"""
+        digests = ''.join(self.get(name).digest for name in sorted(self._assets))
+        return hashlib.sha1(digests.encode('ascii')).hexdigest()[:12]
+
+    def serve(self, filename):
+        """View serving the best precompressed variant the client accepts"""
+        asset = self._by_hashed_name.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = request.accept_encodings.best_match(
+            [name for name in ENCODINGS if name in asset.variants]) or 'identity'
+        response = current_app.response_class(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.set_etag('%s-%s' % (asset.digest, encoding))
+        return response.make_conditional(request)
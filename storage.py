@@ -0,0 +1,677 @@
+"""
+Garden Trade Hub - Trade storage
+Pluggable storage backends for trade listings, SQLite by default
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, deque
+from itertools import islice
+
+from geo import geocode, geocode_lat, geocode_lon
+from models import FIELD_DEFAULTS, TRADE_FIELDS, Trade
+
+# Columns of the trades table, in Trade field order
+TRADE_COLUMNS = TRADE_FIELDS
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'garden_trades.db')
+
+# Categories offered by the add-trade form and the category filter
+TRADE_CATEGORIES = ('Plants', 'Seeds', 'Tools', 'Supplies', 'Other')
+
+# Listings the site ships with; applied by the seed migration
+SEED_TRADES = [
+    {
+        "id": 1,
+        "title": "Tomato Seedlings for Herbs",
+        "category": "Plants",
+        "offering": "6 healthy tomato seedlings (Roma and Cherry varieties)",
+        "seeking": "Herb cuttings (basil, oregano, thyme)",
+        "description": "I have extra tomato seedlings that need good homes. Looking for herb cuttings to start my herb garden.",
+        "location": "Portland, OR",
+        "contact_name": "Sarah Johnson",
+        "contact_email": "sarah.j@email.com",
+        "contact_phone": "(503) 555-0123",
+        "created_at": "2025-07-08"
+    },
+    {
+        "id": 2,
+        "title": "Garden Tools Exchange",
+        "category": "Tools",
+        "offering": "Rake and small shovel, lightly used",
+        "seeking": "Pruning shears or watering can",
+        "description": "Downsizing my tool collection. These are in great condition and ready for a new garden.",
+        "location": "Seattle, WA",
+        "contact_name": "Mike Chen",
+        "contact_email": "mike.chen@email.com",
+        "contact_phone": "(206) 555-0456",
+        "created_at": "2025-07-07"
+    },
+    {
+        "id": 3,
+        "title": "Organic Seeds Collection",
+        "category": "Seeds",
+        "offering": "Variety pack of organic vegetable seeds",
+        "seeking": "Flower seeds or bulbs",
+        "description": "I have extra packets of organic carrot, lettuce, and radish seeds. Looking for flower seeds to beautify my garden.",
+        "location": "San Francisco, CA",
+        "contact_name": "Emily Rodriguez",
+        "contact_email": "emily.r@email.com",
+        "contact_phone": "",
+        "created_at": "2025-07-06"
+    }
+]
+
+
+class TradeStore:
+    """Interface every storage backend implements.
+
+    Listings are ordered newest first.  ``add()`` allocates the id and
+    returns the stored record; ids are never reused after ``delete()``.
+    """
+
+    def add(self, trade):
+        raise NotImplementedError
+
+    def add_many(self, trades, reposts=None):
+        """Insert ``trades`` together and return the stored records, in order.
+
+        ``reposts`` maps a trade's position in the batch to the position of
+        the earlier trade in the same batch it reposts; its ``duplicate_of``
+        is set to that trade's id as it is written.  Backends insert the
+        whole batch atomically; the default falls back to one ``add()`` per
+        trade.
+        """
+        reposts = reposts or {}
+        stored = []
+        for position, trade in enumerate(trades):
+            if position in reposts:
+                trade = dict(trade, duplicate_of=stored[reposts[position]].id)
+            stored.append(self.add(trade))
+        return stored
+
+    def get(self, trade_id):
+        raise NotImplementedError
+
+    def get_many(self, trade_ids):
+        """``{trade_id: trade}`` for the ids that exist"""
+        found = {}
+        for trade_id in trade_ids:
+            trade = self.get(trade_id)
+            if trade is not None:
+                found[trade_id] = trade
+        return found
+
+    def delete(self, trade_id):
+        """Remove a trade; returns False if it did not exist.
+
+        Trades marked as reposts of it have their ``duplicate_of`` cleared,
+        so it never names a listing that is gone.
+        """
+        raise NotImplementedError
+
+    def page(self, after_id=None, limit=None, category=None, location=None):
+        """Newest-first listings following ``after_id`` (KeyError if unknown).
+
+        ``category`` and ``location`` restrict the page; locations compare
+        through normalize_location().
+        """
+        raise NotImplementedError
+
+    def facets(self, location=None):
+        """``{category: count}`` over all trades, or those at ``location``"""
+        raise NotImplementedError
+
+    def added_after(self, trade_id, limit=None):
+        """Trades with an id above ``trade_id``, in insertion (id) order"""
+        raise NotImplementedError
+
+    def last_id(self):
+        """Highest id allocated so far (0 when nothing was ever added)"""
+        raise NotImplementedError
+
+    def coordinates(self):
+        """``(trade_id, lat, lon)`` for every trade whose location geocodes"""
+        raise NotImplementedError
+
+    def version(self):
+        """Dataset version, incremented by every insert and delete"""
+        raise NotImplementedError
+
+    def changes(self, since, limit=None):
+        """``(version, op, trade_id)`` log entries after version ``since``.
+
+        ``op`` is ``'insert'`` or ``'delete'``; every insert and delete gets
+        its own version.  KeyError if the log does not reach back to
+        ``since`` (or ``since`` is ahead of the dataset).
+        """
+        raise NotImplementedError
+
+    def last_modified(self):
+        """Unix timestamp of the last insert or delete"""
+        raise NotImplementedError
+
+    def all(self):
+        return self.page()
+
+    def iter_all(self, batch_size=500, **filters):
+        """Newest-first iterator that holds at most ``batch_size`` rows at once"""
+        after_id = None
+        while True:
+            batch = self.page(after_id=after_id, limit=batch_size, **filters)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1].id
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+def normalize_location(location):
+    """Case- and spacing-insensitive key for a free-text location"""
+    parts = (' '.join(part.split()) for part in (location or '').lower().split(','))
+    return ', '.join(part for part in parts if part)
+
+
+class _Listing:
+    """Append-only run of trades, newest last, with O(1) cursor positions"""
+
+    __slots__ = ('trades', 'positions')
+
+    def __init__(self, trades=()):
+        self.trades = deque()
+        self.positions = {}
+        for trade in trades:
+            self.append(trade)
+
+    def append(self, trade):
+        self.positions[trade.id] = len(self.trades)
+        self.trades.append(trade)
+
+    def __len__(self):
+        return len(self.trades)
+
+    def page(self, after_id=None, limit=None, accept=None):
+        skip = 0
+        if after_id is not None:
+            position = self.positions.get(after_id)
+            if position is None:
+                raise KeyError(after_id)
+            skip = len(self.trades) - position
+        newest = islice(reversed(self.trades), skip, None)
+        if accept is not None:
+            newest = filter(accept, newest)
+        return list(islice(newest, limit))
+
+
+class MemoryTradeStore(TradeStore):
+    """Process-local, append-only store; listings are lost on restart.
+
+    Every insert and delete bumps the version and is appended to
+    ``_changes``, versions ascending, for changes() to bisect.
+
+    Trades are appended to a deque and read back from the right, so an
+    insert is O(1) and newest-first pages never shift existing entries.
+    Ids come from a lock-protected monotonic counter and ``_by_id`` gives
+    O(1) lookup.  Per-category and per-location listings are maintained on
+    insert so filtered pages and facet counts never scan every trade.
+    ``delete()`` is O(n) as it rebuilds the listings; trades are rarely removed.
+    """
+
+    def __init__(self, seed=True):
+        self._by_id = {}
+        self._next_id = 1
+        self._version = 1
+        self._changes = []
+        self._modified_at = time.time()
+        self._lock = threading.Lock()
+        self._reindex()
+        if seed:
+            for trade in reversed(SEED_TRADES):
+                self._append(Trade.from_dict(trade))
+        # Seeds predate the change log, as they do in the SQLite schema
+        self._log_floor = self._version
+
+    def _reindex(self, trades=()):
+        self._listing = _Listing()
+        self._categories = {}
+        self._locations = {}
+        for trade in trades:
+            self._index(trade)
+
+    def _index(self, trade):
+        self._listing.append(trade)
+        self._categories.setdefault(trade.category, _Listing()).append(trade)
+        self._locations.setdefault(normalize_location(trade.location), _Listing()).append(trade)
+
+    def _append(self, trade):
+        self._index(trade)
+        self._by_id[trade.id] = trade
+        self._next_id = max(self._next_id, trade.id + 1)
+
+    def _record(self, op, trade_id):
+        self._version += 1
+        self._changes.append((self._version, op, trade_id))
+        self._modified_at = time.time()
+
+    def add(self, trade):
+        with self._lock:
+            trade = Trade.from_dict(trade, id=self._next_id)
+            self._append(trade)
+            self._record('insert', trade.id)
+        return trade
+
+    def add_many(self, trades, reposts=None):
+        reposts = reposts or {}
+        with self._lock:
+            stored = []
+            for position, trade in enumerate(trades):
+                trade = Trade.from_dict(trade, id=self._next_id)
+                if position in reposts:
+                    trade.duplicate_of = stored[reposts[position]].id
+                self._append(trade)
+                self._record('insert', trade.id)
+                stored.append(trade)
+        return stored
+
+    def get(self, trade_id):
+        return self._by_id.get(trade_id)
+
+    def delete(self, trade_id):
+        with self._lock:
+            if self._by_id.pop(trade_id, None) is None:
+                return False
+            kept = [t for t in self._listing.trades if t.id != trade_id]
+            for trade in kept:
+                if trade.duplicate_of == trade_id:
+                    trade.duplicate_of = None
+            self._reindex(kept)
+            self._record('delete', trade_id)
+        return True
+
+    def page(self, after_id=None, limit=None, category=None, location=None):
+        with self._lock:
+            if category is None and location is None:
+                return self._listing.page(after_id, limit)
+
+            location_key = None if location is None else normalize_location(location)
+            candidates = []
+            if category is not None:
+                candidates.append(self._categories.get(category, _Listing()))
+            if location_key is not None:
+                candidates.append(self._locations.get(location_key, _Listing()))
+            listing = min(candidates, key=len)
+
+            accept = None
+            if len(candidates) > 1:
+                accept = lambda trade: (trade.category == category and
+                                        normalize_location(trade.location) == location_key)
+            return listing.page(after_id, limit, accept)
+
+    def iter_all(self, batch_size=500, **filters):
+        # Trades already live in memory; a snapshot of references is enough
+        return iter(self.page(**filters))
+
+    def facets(self, location=None):
+        with self._lock:
+            if location is None:
+                return {category: len(listing) for category, listing in self._categories.items()}
+            listing = self._locations.get(normalize_location(location), _Listing())
+            return dict(Counter(trade.category for trade in listing.trades))
+
+    def added_after(self, trade_id, limit=None):
+        # Ids are dense apart from deletions, so walking the id range costs
+        # the number of newer trades rather than the size of the store
+        newer = []
+        for candidate in range(max(trade_id, 0) + 1, self._next_id):
+            trade = self._by_id.get(candidate)
+            if trade is not None:
+                newer.append(trade)
+                if len(newer) == limit:
+                    break
+        return newer
+
+    def last_id(self):
+        return self._next_id - 1
+
+    def coordinates(self):
+        with self._lock:
+            trades = list(self._by_id.values())
+        for trade in trades:
+            point = geocode(trade.location)
+            if point is not None:
+                yield trade.id, point[0], point[1]
+
+    def version(self):
+        return self._version
+
+    def changes(self, since, limit=None):
+        with self._lock:
+            if not self._log_floor <= since <= self._version:
+                raise KeyError(since)
+            start = bisect_right(self._changes, (since, '\uffff'))
+            end = len(self._changes) if limit is None else start + limit
+            return self._changes[start:end]
+
+    def last_modified(self):
+        return self._modified_at
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = (
+    """
+    CREATE TABLE trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        offering TEXT NOT NULL,
+        seeking TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        location TEXT NOT NULL DEFAULT '',
+        contact_name TEXT NOT NULL,
+        contact_email TEXT NOT NULL,
+        contact_phone TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX idx_trades_created ON trades (created_at, id);
+    CREATE INDEX idx_trades_category ON trades (category, created_at, id);
+    CREATE INDEX idx_trades_location ON trades (location);
+    """,
+    SEED_TRADES,
+    """
+    ALTER TABLE trades ADD COLUMN location_key TEXT NOT NULL DEFAULT '';
+    UPDATE trades SET location_key = normalize_location(location);
+    DROP INDEX idx_trades_location;
+    CREATE INDEX idx_trades_location ON trades (location_key, created_at, id);
+    """,
+    """
+    CREATE TABLE dataset (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        modified_at REAL NOT NULL
+    );
+    INSERT INTO dataset VALUES (1, 1, (julianday('now') - 2440587.5) * 86400.0);
+    CREATE TRIGGER trades_version_insert AFTER INSERT ON trades BEGIN
+        UPDATE dataset SET version = version + 1,
+                           modified_at = (julianday('now') - 2440587.5) * 86400.0;
+    END;
+    CREATE TRIGGER trades_version_delete AFTER DELETE ON trades BEGIN
+        UPDATE dataset SET version = version + 1,
+                           modified_at = (julianday('now') - 2440587.5) * 86400.0;
+    END;
+    """,
+    """
+    CREATE TABLE changes (
+        version INTEGER PRIMARY KEY,
+        op TEXT NOT NULL CHECK (op IN ('insert', 'delete')),
+        trade_id INTEGER NOT NULL
+    );
+    ALTER TABLE dataset ADD COLUMN log_floor INTEGER NOT NULL DEFAULT 0;
+    UPDATE dataset SET log_floor = version;
+    DROP TRIGGER trades_version_insert;
+    DROP TRIGGER trades_version_delete;
+    CREATE TRIGGER trades_version_insert AFTER INSERT ON trades BEGIN
+        UPDATE dataset SET version = version + 1,
+                           modified_at = (julianday('now') - 2440587.5) * 86400.0;
+        INSERT INTO changes VALUES ((SELECT version FROM dataset), 'insert', NEW.id);
+    END;
+    CREATE TRIGGER trades_version_delete AFTER DELETE ON trades BEGIN
+        UPDATE dataset SET version = version + 1,
+                           modified_at = (julianday('now') - 2440587.5) * 86400.0;
+        INSERT INTO changes VALUES ((SELECT version FROM dataset), 'delete', OLD.id);
+    END;
+    """,
+    """
+    ALTER TABLE trades ADD COLUMN lat REAL;
+    ALTER TABLE trades ADD COLUMN lon REAL;
+    UPDATE trades SET lat = geocode_lat(location), lon = geocode_lon(location);
+    """,
+    """
+    CREATE TABLE category_counts (
+        category TEXT PRIMARY KEY,
+        trades INTEGER NOT NULL
+    );
+    INSERT INTO category_counts SELECT category, COUNT(*) FROM trades GROUP BY category;
+    CREATE TRIGGER trades_category_insert AFTER INSERT ON trades BEGIN
+        INSERT INTO category_counts VALUES (NEW.category, 1)
+            ON CONFLICT (category) DO UPDATE SET trades = trades + 1;
+    END;
+    CREATE TRIGGER trades_category_delete AFTER DELETE ON trades BEGIN
+        UPDATE category_counts SET trades = trades - 1 WHERE category = OLD.category;
+    END;
+    """,
+    """
+    ALTER TABLE trades ADD COLUMN duplicate_of INTEGER;
+    """,
+    """
+    CREATE INDEX idx_trades_duplicate_of ON trades (duplicate_of) WHERE duplicate_of IS NOT NULL;
+    UPDATE trades SET duplicate_of = NULL
+        WHERE duplicate_of IS NOT NULL AND duplicate_of NOT IN (SELECT id FROM trades);
+    CREATE TRIGGER trades_duplicate_delete AFTER DELETE ON trades BEGIN
+        UPDATE trades SET duplicate_of = NULL WHERE duplicate_of = OLD.id;
+    END;
+    """,
+    """
+    UPDATE trades SET lat = geocode_lat(location), lon = geocode_lon(location)
+        WHERE lat IS NOT NULL;
+    """,
+)
+
+# Derived columns reuse the location parameter by number, so rows bind only
+# their own values
+_LOCATION_PARAM = '?%d' % TRADE_COLUMNS.index('location')
+INSERT_SQL = ('INSERT INTO trades (%s, location_key, lat, lon) VALUES (%s, normalize_location(%s), '
+              'geocode_lat(%s), geocode_lon(%s))'
+              % (', '.join(TRADE_COLUMNS[1:]),
+                 ', '.join('?%d' % number for number in range(1, len(TRADE_COLUMNS))),
+                 _LOCATION_PARAM, _LOCATION_PARAM, _LOCATION_PARAM))
+# The seed migration runs against the original table, before later columns
+SEED_COLUMNS = tuple(SEED_TRADES[0])
+INSERT_WITH_ID_SQL = ('INSERT INTO trades (%s) VALUES (%s)'
+                      % (', '.join(SEED_COLUMNS), ', '.join('?' * len(SEED_COLUMNS))))
+SELECT_SQL = 'SELECT %s FROM trades' % ', '.join(TRADE_COLUMNS)
+GET_SQL = SELECT_SQL + ' WHERE id = ?'
+ORDER_SQL = ' ORDER BY created_at DESC, id DESC LIMIT ?'
+CURSOR_SQL = 'SELECT created_at, id FROM trades WHERE id = ?'
+COUNT_SQL = 'SELECT COUNT(*) FROM trades'
+# Kept current by triggers, so the unfiltered facets never scan trades
+FACETS_SQL = 'SELECT category, trades FROM category_counts WHERE trades > 0'
+LOCATION_FACETS_SQL = 'SELECT category, COUNT(*) FROM trades WHERE location_key = ? GROUP BY category'
+DELETE_SQL = 'DELETE FROM trades WHERE id = ?'
+ADDED_AFTER_SQL = SELECT_SQL + ' WHERE id > ? ORDER BY id LIMIT ?'
+SEQUENCE_SQL = "SELECT seq FROM sqlite_sequence WHERE name = 'trades'"
+VERSION_SQL = 'SELECT version FROM dataset'
+LOG_BOUNDS_SQL = 'SELECT log_floor, version FROM dataset'
+CHANGES_SQL = 'SELECT version, op, trade_id FROM changes WHERE version > ? ORDER BY version LIMIT ?'
+GET_MANY_SQL = SELECT_SQL + ' WHERE id IN (%s)'
+COORDINATES_SQL = 'SELECT id, lat, lon FROM trades WHERE lat IS NOT NULL'
+MODIFIED_SQL = 'SELECT modified_at FROM dataset'
+
+
+def _statements(script):
+    """Split a migration script into complete statements (triggers included)"""
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ''
+    if statement.strip():
+        raise ValueError('incomplete SQL statement in migration: %r' % statement)
+
+
+def _insert_values(trade):
+    return tuple(trade.get(column, FIELD_DEFAULTS[column]) for column in TRADE_COLUMNS[1:])
+
+
+def _to_trade(row):
+    return None if row is None else Trade(*row)
+
+
+class SQLiteTradeStore(TradeStore):
+    """SQLite-backed store shared by every worker process using the same file.
+
+    Each thread gets its own connection in WAL mode so readers never block
+    the writer.  Queries are fixed SQL strings with bound parameters, which
+    sqlite3 keeps prepared in its per-connection statement cache.
+    """
+
+    def __init__(self, path=DEFAULT_DATABASE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._migrate()
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=64,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.create_function('normalize_location', 1, normalize_location, deterministic=True)
+            conn.create_function('geocode_lat', 1, geocode_lat, deterministic=True)
+            conn.create_function('geocode_lon', 1, geocode_lon, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self):
+        conn = self.connection
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                if isinstance(migration, str):
+                    for statement in _statements(migration):
+                        conn.execute(statement)
+                else:
+                    conn.executemany(INSERT_WITH_ID_SQL, (
+                        tuple(trade[column] for column in SEED_COLUMNS)
+                        for trade in reversed(migration)))
+                conn.execute('PRAGMA user_version = %d' % number)
+
+    def add(self, trade):
+        conn = self.connection
+        with conn:
+            cursor = conn.execute(INSERT_SQL, _insert_values(trade))
+        return Trade.from_dict(trade, id=cursor.lastrowid)
+
+    def add_many(self, trades, reposts=None):
+        # Under BEGIN IMMEDIATE nothing else can insert, and AUTOINCREMENT
+        # hands out ids strictly after sqlite_sequence, so the batch's ids
+        # are known up front and executemany needs no per-row round trip.
+        trades = list(trades)
+        if not trades:
+            return []
+        conn = self.connection
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(SEQUENCE_SQL).fetchone()
+            first_id = (row[0] if row else 0) + 1
+            for position, original in (reposts or {}).items():
+                trades[position] = dict(trades[position], duplicate_of=first_id + original)
+            conn.executemany(INSERT_SQL, (_insert_values(trade) for trade in trades))
+        return [Trade.from_dict(trade, id=trade_id)
+                for trade_id, trade in enumerate(trades, first_id)]
+
+    def get(self, trade_id):
+        return _to_trade(self.connection.execute(GET_SQL, (trade_id,)).fetchone())
+
+    def delete(self, trade_id):
+        conn = self.connection
+        with conn:
+            return conn.execute(DELETE_SQL, (trade_id,)).rowcount > 0
+
+    def page(self, after_id=None, limit=None, category=None, location=None):
+        conn = self.connection
+        conditions, params = [], []
+        if category is not None:
+            conditions.append('category = ?')
+            params.append(category)
+        if location is not None:
+            conditions.append('location_key = ?')
+            params.append(normalize_location(location))
+        if after_id is not None:
+            position = conn.execute(CURSOR_SQL, (after_id,)).fetchone()
+            if position is None:
+                raise KeyError(after_id)
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(position)
+        params.append(-1 if limit is None else limit)
+
+        sql = SELECT_SQL
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        return [_to_trade(row) for row in conn.execute(sql + ORDER_SQL, params)]
+
+    def facets(self, location=None):
+        if location is None:
+            rows = self.connection.execute(FACETS_SQL)
+        else:
+            rows = self.connection.execute(LOCATION_FACETS_SQL, (normalize_location(location),))
+        return dict(rows.fetchall())
+
+    def added_after(self, trade_id, limit=None):
+        rows = self.connection.execute(ADDED_AFTER_SQL, (trade_id, -1 if limit is None else limit))
+        return [_to_trade(row) for row in rows]
+
+    def last_id(self):
+        row = self.connection.execute(SEQUENCE_SQL).fetchone()
+        return row[0] if row else 0
+
+    def get_many(self, trade_ids):
+        trade_ids = list(trade_ids)
+        found = {}
+        for start in range(0, len(trade_ids), 500):
+            chunk = trade_ids[start:start + 500]
+            rows = self.connection.execute(GET_MANY_SQL % ', '.join('?' * len(chunk)), chunk)
+            for row in rows:
+                trade = _to_trade(row)
+                found[trade.id] = trade
+        return found
+
+    def coordinates(self):
+        return self.connection.execute(COORDINATES_SQL)
+
+    def version(self):
+        return self.connection.execute(VERSION_SQL).fetchone()[0]
+
+    def changes(self, since, limit=None):
+        conn = self.connection
+        # One read transaction, so the bounds and the entries agree
+        with conn:
+            conn.execute('BEGIN')
+            floor, version = conn.execute(LOG_BOUNDS_SQL).fetchone()
+            if not floor <= since <= version:
+                raise KeyError(since)
+            return conn.execute(CHANGES_SQL, (since, -1 if limit is None else limit)).fetchall()
+
+    def last_modified(self):
+        return self.connection.execute(MODIFIED_SQL).fetchone()[0]
+
+    def __len__(self):
+        return self.connection.execute(COUNT_SQL).fetchone()[0]
+
+
+# Backends selectable through the TRADE_STORE environment variable
+STORE_BACKENDS = {
+    'sqlite': lambda: SQLiteTradeStore(os.environ.get('DATABASE_PATH', DEFAULT_DATABASE_PATH)),
+    'memory': MemoryTradeStore,
+}
+
+
+def create_store(backend=None):
+    """Build the configured trade store (``sqlite`` unless TRADE_STORE says otherwise)"""
+    backend = backend or os.environ.get('TRADE_STORE', 'sqlite')
+    try:
+        factory = STORE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError('unknown TRADE_STORE backend: %r' % backend) from None
+    return factory()
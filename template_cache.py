@@ -0,0 +1,81 @@
+"""
+Garden Trade Hub - Compiled template cache
+Compiles the inline page templates once and hands out the compiled objects
+"""
+
+import hashlib
+import threading
+
+
+class TemplateCache:
+    """Keyed cache of compiled Jinja templates with hit/miss counters.
+
+    Templates are registered with a callable returning their source so the
+    cache can notice edits when ``auto_reload`` is on (development), in which
+    case a changed source is recompiled on the next lookup.  By default this
+    follows ``jinja_env.auto_reload``, which Flask turns on in debug mode.
+    """
+
+    def __init__(self, jinja_env, auto_reload=None):
+        self.jinja_env = jinja_env
+        self.auto_reload = auto_reload
+        self.hits = 0
+        self.misses = 0
+        self._sources = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, source):
+        """Register a template under ``name`` and compile it eagerly"""
+        loader = source if callable(source) else (lambda: source)
+        with self._lock:
+            self._sources[name] = loader
+            self._compiled.pop(name, None)
+        return self.get(name)
+
+    def get(self, name):
+        """Return the compiled template registered under ``name``"""
+        entry = self._compiled.get(name)
+        if entry is not None and self._reloading():
+            if entry[0] != self._digest(self._sources[name]()):
+                entry = None
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        with self._lock:
+            source = self._sources[name]()
+            template = self.jinja_env.from_string(source)
+            template.name = name
+            self._compiled[name] = (self._digest(source), template)
+            self.misses += 1
+        return template
+
+    def version(self, name):
+        """Short digest of the compiled source, usable as a cache key"""
+        self.get(name)
+        return self._compiled[name][0][:12]
+
+    def invalidate(self, name=None):
+        """Drop one compiled template, or all of them when ``name`` is None"""
+        with self._lock:
+            if name is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(name, None)
+
+    def _reloading(self):
+        if self.auto_reload is None:
+            return self.jinja_env.auto_reload
+        return self.auto_reload
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'templates': sorted(self._compiled),
+        }
+
+    @staticmethod
+    def _digest(source):
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
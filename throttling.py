@@ -0,0 +1,214 @@
+"""
+Garden Trade Hub - Write throttling
+Token-bucket rate limits with pluggable backends, and a bounded gate that
+keeps bursts of writes from occupying every request thread
+"""
+
+import math
+import os
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # redis is optional; limits are then per process
+    redis = None
+
+# Seconds per rate period accepted in limit strings such as "10/minute"
+PERIODS = {'second': 1.0, 'minute': 60.0, 'hour': 3600.0, 'day': 86400.0}
+
+
+def parse_limit(value):
+    """``(burst, per_second)`` for ``"<count>/<period>"``; None for an empty value"""
+    if not value:
+        return None
+    count, _, period = value.partition('/')
+    try:
+        burst = int(count)
+        seconds = PERIODS[period.strip().lower().rstrip('s') or 'second']
+    except (KeyError, ValueError):
+        raise ValueError('rate limit must look like "10/minute": %r' % value) from None
+    if burst < 1:
+        raise ValueError('rate limit count must be positive: %r' % value)
+    return burst, burst / seconds
+
+
+class MemoryBuckets:
+    """Token buckets in a process-local dict.
+
+    A bucket refilled to its burst is the same as no bucket, so idle keys
+    are swept once more than ``max_keys`` are held.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate, now=None):
+        """Spend one token; returns seconds until one is available (0 when allowed)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp, _full_at = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._buckets = {key: bucket for key, bucket in self._buckets.items()
+                                 if bucket[2] > now}
+            return wait
+
+
+class RedisBuckets:
+    """Token buckets in Redis (or anything speaking its protocol), shared by
+    every worker pointed at the same server.
+
+    Each take is one atomic Lua call on a hash holding the bucket; keys
+    expire once the bucket would be full again.
+    """
+
+    SCRIPT = """
+    local burst = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+    local tokens = tonumber(bucket[1]) or burst
+    local stamp = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+    return tostring(wait)
+    """
+
+    def __init__(self, url, prefix='garden_trade:ratelimit:'):
+        if redis is None:
+            raise ValueError('RATE_LIMIT_BACKEND=redis but the redis package is not installed')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, burst, rate, now=None):
+        now = time.time() if now is None else now
+        return float(self._take(keys=[self.prefix + key], args=[burst, rate, now]))
+
+
+# Backends selectable through the RATE_LIMIT_BACKEND environment variable
+BUCKET_BACKENDS = {
+    'memory': MemoryBuckets,
+    'redis': lambda: RedisBuckets(os.environ.get('REDIS_URL', 'redis://localhost:6379/0')),
+}
+
+
+class RateLimiter:
+    """Named token-bucket limits checked together against one backend.
+
+    ``limits`` maps a limit name (``ip``, ``email``) to ``(burst, rate)``.
+    ``check()`` takes a token from each keyed bucket in turn, so a client is
+    admitted only when all of its limits allow it; the first refusal stops
+    the walk so a throttled client does not drain its other buckets.
+    """
+
+    def __init__(self, backend, limits):
+        self.backend = backend
+        self.limits = {name: limit for name, limit in limits.items() if limit}
+        self.limited = {name: 0 for name in self.limits}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls):
+        backend = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+        try:
+            factory = BUCKET_BACKENDS[backend]
+        except KeyError:
+            raise ValueError('unknown RATE_LIMIT_BACKEND: %r' % backend) from None
+        return cls(factory(), {
+            'ip': parse_limit(os.environ.get('RATE_LIMIT_IP', '20/minute')),
+            'email': parse_limit(os.environ.get('RATE_LIMIT_EMAIL', '5/minute')),
+        })
+
+    def check(self, **keys):
+        """Seconds the caller must wait before retrying, or 0 when admitted"""
+        for name, key in keys.items():
+            limit = self.limits.get(name)
+            if limit is None or not key:
+                continue
+            burst, rate = limit
+            wait = self.backend.take('%s:%s' % (name, key), burst, rate)
+            if wait > 0:
+                with self._lock:
+                    self.limited[name] += 1
+                return wait
+        return 0.0
+
+
+def retry_after_header(seconds):
+    """Whole seconds for a ``Retry-After`` header, never less than 1"""
+    return str(max(1, math.ceil(seconds)))
+
+
+class Overloaded(Exception):
+    """The write gate is full; ``retry_after`` is a hint in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__('too many writes in progress')
+        self.retry_after = retry_after
+
+
+class WriteGate:
+    """Bounded admission for writes.
+
+    At most ``concurrency`` writes run at once and at most ``max_waiting``
+    more queue behind them for up to ``timeout`` seconds; anything beyond
+    that is turned away with Overloaded instead of occupying another
+    request thread, so reads keep the rest of the worker.
+    """
+
+    def __init__(self, concurrency=1, max_waiting=2, timeout=5.0):
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls):
+        return cls(
+            concurrency=int(os.environ.get('WRITE_CONCURRENCY', 1)),
+            max_waiting=int(os.environ.get('WRITE_QUEUE_SIZE', 2)),
+            timeout=float(os.environ.get('WRITE_QUEUE_TIMEOUT', 5)),
+        )
+
+    def __enter__(self):
+        if self._slots.acquire(blocking=False):
+            return self
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise Overloaded(self.timeout)
+            self.waiting += 1
+        acquired = False
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                if not acquired:
+                    self.rejected += 1
+        if not acquired:
+            raise Overloaded(self.timeout)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._slots.release()